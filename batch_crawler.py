@@ -24,6 +24,12 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 
+def read_batch_file(path):
+    """Read a batch file from split_urls_to_excel.py (Parquet, or Excel from older splits)"""
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_excel(path)
+
 class LuatVietnamBatchCrawler:
     def __init__(self, username, password, excel_file, download_folder=None):
         self.username = username
@@ -93,7 +99,7 @@ class LuatVietnamBatchCrawler:
         """Rebuild progress tracking from existing downloaded files"""
         try:
             # Load Excel file to get URL mappings
-            df = pd.read_excel(self.excel_file)
+            df = read_batch_file(self.excel_file)
             existing_files = set(os.listdir(self.download_folder))
             downloaded_urls = set()
             
@@ -1142,7 +1148,7 @@ def choose_excel_file():
     # Get list of Excel files
     excel_files = []
     for file in os.listdir(batch_dir):
-        if file.endswith('.xlsx') and not file.startswith('~'):  # Exclude temp files
+        if file.endswith(('.xlsx', '.parquet')) and not file.startswith('~'):  # Exclude temp files
             excel_files.append(file)
     
     if not excel_files:
@@ -1160,7 +1166,7 @@ def choose_excel_file():
     for i, file in enumerate(excel_files, 1):
         filepath = os.path.join(batch_dir, file)
         try:
-            df = pd.read_excel(filepath)
+            df = read_batch_file(filepath)
             url_count = len(df)
             
             # Try to get batch info
@@ -1283,7 +1289,7 @@ def main():
     
     # Load and validate Excel file
     try:
-        df = pd.read_excel(excel_file)
+        df = read_batch_file(excel_file)
         print(f"\n✅ Loaded {len(df)} documents from {os.path.basename(excel_file)}")
         
         # Show batch info if available
@@ -24,6 +24,12 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 
+def read_batch_file(path):
+    """Read a batch file from split_urls_to_excel.py (Parquet, or Excel from older splits)"""
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_excel(path)
+
 class LuatVietnamBatchCrawler:
     def __init__(self, username, password, excel_file, download_folder=None):
         self.username = username
@@ -93,7 +99,7 @@ class LuatVietnamBatchCrawler:
         """Rebuild progress tracking from existing downloaded files"""
         try:
             # Load Excel file to get URL mappings
-            df = pd.read_excel(self.excel_file)
+            df = read_batch_file(self.excel_file)
             existing_files = set(os.listdir(self.download_folder))
             downloaded_urls = set()
             
@@ -1438,7 +1444,7 @@ def main():
         print("Run split_urls_to_excel.py first to create batch files.")
         return
     
-    batch_files = [f for f in os.listdir(batch_folder) if f.endswith('.xlsx')]
+    batch_files = [f for f in os.listdir(batch_folder) if f.endswith(('.xlsx', '.parquet'))]
     if not batch_files:
         print(f"❌ No Excel files found in '{batch_folder}'!")
         print("Run split_urls_to_excel.py first to create batch files.")
@@ -1450,7 +1456,7 @@ def main():
     for i, file in enumerate(batch_files, 1):
         filepath = os.path.join(batch_folder, file)
         try:
-            df = pd.read_excel(filepath)
+            df = read_batch_file(filepath)
             num_urls = len(df)
             
             # Extract batch info from filename if available
@@ -1494,7 +1500,7 @@ def main():
     
     # Step 3: Load selected Excel file
     try:
-        df = pd.read_excel(selected_file)
+        df = read_batch_file(selected_file)
         print(f"\n✅ Loaded {len(df)} documents from {batch_files[file_index]}")
         
         # Show batch info if available
@@ -20,6 +20,17 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 
+# Fields every failure record carries; filled in once when the record is stored
+FAILURE_DEFAULTS = {
+    'error_type': 'UNKNOWN_ERROR',
+    'retry_count': 0,
+    'pdf_url': 'Not found',
+    'content_type': None,
+    'status_code': None,
+    'file_size': None,
+    'step': None
+}
+
 class LuatVietnamBulkDownloader:
     def __init__(self, username, password, download_folder="all_traffic_law_pdfs"):
         self.username = username
@@ -122,7 +133,7 @@ class LuatVietnamBulkDownloader:
         if os.path.exists(self.error_log_file):
             try:
                 with open(self.error_log_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    return [{**FAILURE_DEFAULTS, **entry} for entry in json.load(f)]
             except:
                 return []
         return []
@@ -159,7 +170,7 @@ class LuatVietnamBulkDownloader:
             if additional_info:
                 existing_entry.update(additional_info)
         else:
-            self.failed_downloads.append(failed_entry)
+            self.failed_downloads.append({**FAILURE_DEFAULTS, **failed_entry})
         
         # Save to file
         try:
@@ -1036,8 +1047,13 @@ class LuatVietnamBulkDownloader:
     
     def process_all_documents(self, documents_df):
         """Process all documents from DataFrame and download PDFs"""
+        self._iter_docs(documents_df.to_dict('records'))
+    
+    def _iter_docs(self, docs):
+        """Download every document in a list of {'title', 'url'} dicts"""
         
-        print(f"📋 Processing {len(documents_df)} documents")
+        total_docs = len(docs)
+        print(f"📋 Processing {total_docs} documents")
         print("="*80)
         
         # Initialize browser once for all downloads
@@ -1049,30 +1065,30 @@ class LuatVietnamBulkDownloader:
             skipped_count = 0
             total_size = 0
             
-            for index, row in documents_df.iterrows():
+            for index, row in enumerate(docs):
                 document_title = row['title']
                 document_url = row['url']
                 
                 # Skip if already downloaded (primary resume logic)
                 if document_url in self.downloaded_urls:
-                    print(f"⏭️ [{index+1}/{len(documents_df)}] SKIPPED (already downloaded): {document_title[:60]}...")
+                    print(f"⏭️ [{index+1}/{total_docs}] SKIPPED (already downloaded): {document_title[:60]}...")
                     skipped_count += 1
                     continue
                 
                 # SKIP PREVIOUSLY FAILED DOWNLOADS - Don't waste time retrying 
                 if document_url in self.failed_urls:
-                    print(f"⚠️ [{index+1}/{len(documents_df)}] SKIPPED (previously failed): {document_title[:60]}...")
+                    print(f"⚠️ [{index+1}/{total_docs}] SKIPPED (previously failed): {document_title[:60]}...")
                     skipped_count += 1
                     continue
                 
                 # Skip reference/attribute pages that are duplicates (avoid unnecessary processing)
                 if (document_title.lower().strip() in ['vb liên quan', 'thuộc tính', 'vb được hợp nhất'] or
                     'liên quan' in document_title.lower() and len(document_title.strip()) < 20):
-                    print(f"⏭️ [{index+1}/{len(documents_df)}] SKIPPED (reference page): {document_title[:60]}...")
+                    print(f"⏭️ [{index+1}/{total_docs}] SKIPPED (reference page): {document_title[:60]}...")
                     skipped_count += 1
                     continue
                 
-                print(f"\n📄 [{index+1}/{len(documents_df)}] {document_title[:80]}...")
+                print(f"\n📄 [{index+1}/{total_docs}] {document_title[:80]}...")
                 
                 # Create safe filename with unique identifier to prevent overwriting
                 safe_filename = re.sub(r'[^\w\s-]', '', document_title)
@@ -1114,7 +1130,7 @@ class LuatVietnamBulkDownloader:
                         'url': document_url,
                         'filename': full_filename,
                         'index': index + 1,
-                        'total': len(documents_df),
+                        'total': total_docs,
                         'file_type': file_type
                     }
                     
@@ -1138,7 +1154,7 @@ class LuatVietnamBulkDownloader:
                         'url': document_url,
                         'filename': safe_filename,
                         'index': index + 1,
-                        'total': len(documents_df)
+                        'total': total_docs
                     }
                     self.log_failed_download(
                         document_info, 
@@ -1192,7 +1208,7 @@ class LuatVietnamBulkDownloader:
         # Group by error type for better analysis
         error_types = {}
         for entry in self.failed_downloads:
-            error_type = entry.get('error_type', 'UNKNOWN_ERROR')
+            error_type = entry['error_type']
             if error_type not in error_types:
                 error_types[error_type] = []
             error_types[error_type].append(entry)
@@ -1205,8 +1221,8 @@ class LuatVietnamBulkDownloader:
         for i, entry in enumerate(self.failed_downloads, 1):
             print(f"\n{i:3d}. {entry['title'][:60]}...")
             print(f"     URL: {entry['url']}")
-            print(f"     PDF URL: {entry.get('pdf_url', 'Not found')}")
-            print(f"     Error Type: {entry.get('error_type', 'UNKNOWN')}")
+            print(f"     PDF URL: {entry['pdf_url']}")
+            print(f"     Error Type: {entry['error_type']}")
             print(f"     Error: {entry['error']}")
             print(f"     Retry Count: {entry['retry_count']}")
             print(f"     Last Attempt: {entry['timestamp']}")
@@ -1214,7 +1230,7 @@ class LuatVietnamBulkDownloader:
             # Show additional debug info if available
             additional_fields = ['content_type', 'status_code', 'file_size', 'step']
             for field in additional_fields:
-                if field in entry:
+                if entry[field] is not None:
                     print(f"     {field.title()}: {entry[field]}")
             
             print("-" * 60)
@@ -1237,11 +1253,11 @@ class LuatVietnamBulkDownloader:
         timestamps = []
         for entry in self.failed_downloads:
             # Count error types
-            error_type = entry.get('error_type', 'UNKNOWN_ERROR')
+            error_type = entry['error_type']
             stats['error_types'][error_type] = stats['error_types'].get(error_type, 0) + 1
             
             # Count retry attempts
-            retry_count = entry.get('retry_count', 0)
+            retry_count = entry['retry_count']
             stats['retry_counts'][retry_count] = stats['retry_counts'].get(retry_count, 0) + 1
             
             # Track timestamps
@@ -1291,8 +1307,8 @@ class LuatVietnamBulkDownloader:
             for i, entry in enumerate(self.failed_downloads, 1):
                 f.write(f"\n{i:3d}. {entry['title']}\n")
                 f.write(f"     URL: {entry['url']}\n")
-                f.write(f"     PDF URL: {entry.get('pdf_url', 'Not found')}\n")
-                f.write(f"     Error Type: {entry.get('error_type', 'UNKNOWN')}\n")
+                f.write(f"     PDF URL: {entry['pdf_url']}\n")
+                f.write(f"     Error Type: {entry['error_type']}\n")
                 f.write(f"     Error Message: {entry['error']}\n")
                 f.write(f"     Retry Count: {entry['retry_count']}\n")
                 f.write(f"     Timestamp: {entry['timestamp']}\n")
@@ -1300,7 +1316,7 @@ class LuatVietnamBulkDownloader:
                 # Include additional debug information
                 additional_fields = ['content_type', 'status_code', 'file_size', 'step']
                 for field in additional_fields:
-                    if field in entry:
+                    if entry[field] is not None:
                         f.write(f"     {field.title()}: {entry[field]}\n")
                 
                 f.write("\n" + "-" * 40 + "\n")
@@ -1316,21 +1332,13 @@ class LuatVietnamBulkDownloader:
         print(f"🔄 RETRYING {len(self.failed_downloads)} FAILED DOWNLOADS")
         print("="*80)
         
-        retry_list = []
-        for entry in self.failed_downloads:
-            retry_list.append({
-                'title': entry['title'],
-                'url': entry['url']
-            })
-        
-        # Convert to DataFrame and process
-        retry_df = pd.DataFrame(retry_list)
+        retry_list = [{'title': entry['title'], 'url': entry['url']} for entry in self.failed_downloads]
         
         # Clear previous failures to start fresh
         self.failed_downloads = []
         
-        # Process retry list
-        self.process_all_documents(retry_df)
+        # Process retry list directly - no DataFrame round-trip needed
+        self._iter_docs(retry_list)
 
 def main():
     """Download all traffic law documents"""
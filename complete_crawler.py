@@ -6,15 +6,51 @@ This script will systematically crawl ALL pages to collect all 16,463 documents.
 """
 
 import requests
-from bs4 import BeautifulSoup
+from selectolax.parser import HTMLParser
 import pandas as pd
+import openpyxl
 import time
 import logging
 from datetime import datetime
 import os
 import re
 from collections import deque
+from functools import lru_cache
+from urllib.parse import urljoin, urldefrag, urlsplit, urlunsplit, parse_qsl, urlencode
 import hashlib
+from crawl_common import write_workbook
+
+BASE_URL = "https://luatvietnam.vn"
+
+# Query parameters that do not change which documents a listing page shows
+IGNORED_QUERY_PARAMS = {'ShowSapo'}
+
+# Files load_existing_data can resume from
+BACKUP_FILE_RE = re.compile(r'^luatvietnam_(complete|quality)_backup_.*\.xlsx$')
+LEGACY_FILES = ('luatvietnam_complete_collection.xlsx', 'luatvietnam_traffic_laws.xlsx')
+
+# Columns of a crawled document, in spreadsheet order
+DOCUMENT_COLUMNS = ['title', 'url', 'publication_date', 'document_type', 'source_page', 'crawled_date']
+
+def _resolve(base, href):
+    """Resolve a link href against base, returning None for non-HTTP links"""
+    if href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+        return None
+    full_url = urldefrag(urljoin(base, href))[0]
+    if not full_url.startswith(('http://', 'https://')):
+        return None
+    return full_url
+
+@lru_cache(maxsize=65536)
+def _resolve_site(href):
+    """Resolve a root-relative or absolute href, memoized since it resolves the same on every page"""
+    return _resolve(BASE_URL, href)
+
+def _canonical(url):
+    """Normalize a listing URL so equivalent pagination variants compare equal"""
+    parts = urlsplit(url)
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if k not in IGNORED_QUERY_PARAMS))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path.rstrip('/'), query, ''))
 
 class CompleteLuatVietnamCrawler:
     def __init__(self):
@@ -33,11 +69,28 @@ class CompleteLuatVietnamCrawler:
         self.failed_urls = []
         
         # Configuration
-        self.base_url = "https://luatvietnam.vn"
+        self.base_url = BASE_URL
         self.traffic_base = f"{self.base_url}/giao-thong-28"
         self.delay = 2  # seconds between requests
         self.save_interval = 250  # save every N documents
         
+        # Title parsing - type patterns compiled once, checked in priority order
+        type_patterns = {
+            'Luật': r'luật\s+',
+            'Nghị định': r'nghị định\s+',
+            'Thông tư': r'thông tư\s+',
+            'Quyết định': r'quyết định\s+',
+            'Công văn': r'công văn\s+',
+            'Chỉ thị': r'chỉ thị\s+',
+            'Nghị quyết': r'nghị quyết\s+',
+            'Thông báo': r'thông báo\s+',
+            'Kế hoạch': r'kế hoạch\s+',
+            'Chương trình': r'chương trình\s+'
+        }
+        self._type_patterns = [(doc_type, re.compile(pattern)) for doc_type, pattern in type_patterns.items()]
+        self._date_re = re.compile(r'\d{1,2}/\d{1,2}/\d{4}')
+        self._year_re = re.compile(r'\d{4}')
+        
         # Load existing data
         self.load_existing_data()
         
@@ -60,42 +113,39 @@ class CompleteLuatVietnamCrawler:
 
     def load_existing_data(self):
         """Load existing crawled documents to avoid duplicates"""
-        # Try to load the most recent backup file - prioritize complete backups
-        backup_files = [f for f in os.listdir('.') if f.startswith('luatvietnam_complete_backup_')]
-        if not backup_files:
-            backup_files = [f for f in os.listdir('.') if f.startswith('luatvietnam_quality_backup_')]
+        # Classify the working directory in a single pass
+        backup_files = []
+        legacy_files = []
+        with os.scandir('.') as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                match = BACKUP_FILE_RE.match(entry.name)
+                if match:
+                    backup_files.append((match.group(1) == 'complete', entry.name))
+                elif entry.name in LEGACY_FILES:
+                    legacy_files.append(entry.name)
         
         if backup_files:
-            # Find the backup with the highest document count (best progress)
-            best_file = None
-            max_docs = 0
-            
-            for backup_file in backup_files:
+            # Find the backup with the highest document count (best progress) - prioritize complete backups
+            ranked = []
+            for is_complete, backup_file in backup_files:
                 try:
-                    df = pd.read_excel(backup_file)
-                    doc_count = len(df)
-                    if doc_count > max_docs:
-                        max_docs = doc_count
-                        best_file = backup_file
+                    ranked.append(((is_complete, self.count_rows(backup_file)), backup_file))
                 except:
                     continue
+            ranked.sort(reverse=True)
+            best_file = ranked[0][1] if ranked and ranked[0][0][1] > 0 else None
             
             if best_file:
                 try:
                     df = pd.read_excel(best_file)
-                    for _, row in df.iterrows():
-                        url = row['url']
-                        self.processed_urls.add(url)
-                        # Store the document data too
-                        doc = {
-                            'title': row['title'],
-                            'url': url,
-                            'publication_date': row.get('publication_date', ''),
-                            'document_type': row.get('document_type', ''),
-                            'source_page': row.get('source_page', ''),
-                            'crawled_date': row.get('crawled_date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-                        }
-                        self.all_documents.append(doc)
+                    # Store the document data too, column-wise rather than row by row
+                    docs = df.reindex(columns=DOCUMENT_COLUMNS, fill_value='')
+                    if 'crawled_date' not in df:
+                        docs['crawled_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    self.processed_urls.update(docs['url'].tolist())
+                    self.all_documents.extend(docs.to_dict('records'))
                     
                     progress = (len(self.all_documents) / 16463) * 100
                     self.logger.info(f"📂 Loaded {len(self.all_documents):,} existing documents from {best_file}")
@@ -105,18 +155,27 @@ class CompleteLuatVietnamCrawler:
                     self.logger.error(f"❌ Error loading {best_file}: {e}")
         
         # Also try other files
-        for filename in ['luatvietnam_complete_collection.xlsx', 'luatvietnam_traffic_laws.xlsx']:
-            if os.path.exists(filename) and len(self.processed_urls) == 0:
+        for filename in sorted(legacy_files, key=LEGACY_FILES.index):
+            if len(self.processed_urls) == 0:
                 try:
                     df = pd.read_excel(filename)
-                    for _, row in df.iterrows():
-                        url = row['url']
-                        self.processed_urls.add(url)
+                    self.processed_urls.update(df['url'].tolist())
                     self.logger.info(f"📂 Loaded {len(self.processed_urls):,} URLs from {filename}")
                     break
                 except Exception as e:
                     self.logger.error(f"❌ Error loading {filename}: {e}")
 
+    def count_rows(self, filename):
+        """Count data rows in an xlsx file without loading it into a DataFrame"""
+        workbook = openpyxl.load_workbook(filename, read_only=True)
+        try:
+            max_row = workbook.active.max_row
+        finally:
+            workbook.close()
+        if max_row is None:
+            return len(pd.read_excel(filename))
+        return max(max_row - 1, 0)  # minus header row
+
     def is_quality_document(self, title):
         """Filter out auxiliary content and keep only real legal documents"""
         if not title or len(title.strip()) < 10:
@@ -147,40 +206,14 @@ class CompleteLuatVietnamCrawler:
 
     def extract_document_info(self, title, url, source_page):
         """Extract document information from title and URL"""
-        # Extract document type
-        document_type = "Unknown"
-        type_patterns = {
-            'Luật': r'luật\s+',
-            'Nghị định': r'nghị định\s+',
-            'Thông tư': r'thông tư\s+',
-            'Quyết định': r'quyết định\s+',
-            'Công văn': r'công văn\s+',
-            'Chỉ thị': r'chỉ thị\s+',
-            'Nghị quyết': r'nghị quyết\s+',
-            'Thông báo': r'thông báo\s+',
-            'Kế hoạch': r'kế hoạch\s+',
-            'Chương trình': r'chương trình\s+'
-        }
-        
+        # Extract document type (first type in priority order found anywhere in the title wins)
         title_lower = title.lower()
-        for doc_type, pattern in type_patterns.items():
-            if re.search(pattern, title_lower):
-                document_type = doc_type
-                break
+        document_type = next((doc_type for doc_type, pattern in self._type_patterns
+                              if pattern.search(title_lower)), "Unknown")
         
-        # Extract publication date (if available in title)
-        publication_date = ""
-        date_patterns = [
-            r'(\d{1,2}/\d{1,2}/\d{4})',
-            r'(\d{4})',
-            r'năm\s+(\d{4})'
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, title)
-            if match:
-                publication_date = match.group(1)
-                break
+        # Extract publication date (if available in title) - full date first, then a bare year
+        date_match = self._date_re.search(title) or self._year_re.search(title)
+        publication_date = date_match.group(0) if date_match else ""
         
         return {
             'title': title.strip(),
@@ -213,7 +246,7 @@ class CompleteLuatVietnamCrawler:
         if not response:
             return []
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        tree = HTMLParser(response.content)
         documents = []
         
         # Find all document links
@@ -227,29 +260,33 @@ class CompleteLuatVietnamCrawler:
             '.title a'
         ]
         
-        found_links = set()
-        for selector in link_selectors:
-            for link in soup.select(selector):
-                href = link.get('href', '')
-                title = link.get_text(strip=True)
+        # Keyed on URL only - the same document is usually linked several times per page
+        found_links = {}
+        for link in tree.css(', '.join(link_selectors)):
+            href = link.attributes.get('href') or ''
+            title = link.text(strip=True)
+            
+            if href and title:
+                # Reject auxiliary links before doing any URL work
+                if not self.is_quality_document(title):
+                    continue
                 
-                if href and title:
-                    # Convert relative URLs to absolute
-                    if href.startswith('/'):
-                        full_url = self.base_url + href
-                    elif href.startswith('http'):
-                        full_url = href
-                    else:
-                        continue
-                    
-                    # Skip if already processed or not a quality document
-                    if full_url in self.processed_urls or not self.is_quality_document(title):
-                        continue
-                    
-                    found_links.add((title, full_url))
+                # Convert relative URLs to absolute; only page-relative hrefs depend on the page URL
+                if href.startswith(('/', 'http://', 'https://')):
+                    full_url = _resolve_site(href)
+                else:
+                    full_url = _resolve(page_url, href)
+                if full_url is None:
+                    continue
+                
+                # Skip if already processed
+                if full_url in self.processed_urls:
+                    continue
+                
+                found_links.setdefault(full_url, title)
         
         # Convert to document objects
-        for title, url in found_links:
+        for url, title in found_links.items():
             doc = self.extract_document_info(title, url, page_url)
             documents.append(doc)
             self.processed_urls.add(url)
@@ -295,8 +332,11 @@ class CompleteLuatVietnamCrawler:
             ]
             page_urls.extend(search_urls)
         
-        # Remove duplicates and return
-        unique_urls = list(set(page_urls))
+        # Remove duplicates and return; ShowSapo/param-order variants map to the same listing page
+        canonical_urls = {}
+        for url in page_urls:
+            canonical_urls.setdefault(_canonical(url), url)
+        unique_urls = list(canonical_urls.values())
         self.logger.info(f"🔗 Generated {len(unique_urls):,} page URLs to crawl")
         return unique_urls
 
@@ -316,7 +356,7 @@ class CompleteLuatVietnamCrawler:
         filename = f"luatvietnam_complete_backup_{timestamp}.xlsx"
         
         try:
-            df.to_excel(filename, index=False)
+            write_workbook(df, filename)
             self.logger.info(f"💾 Saved {len(df):,} documents to {filename}")
             
             # Progress calculation
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the LuatVietnam crawlers: cached workbook reads, the SQLite crawl state
+and request rate limiting
+"""
+
+import pandas as pd
+import logging
+import sqlite3
+import asyncio
+import time
+import os
+
+def read_excel_cached(xlsx_path):
+    """Read an Excel file through a Parquet shadow copy that is rebuilt whenever the Excel file changes"""
+    parquet_path = os.path.splitext(xlsx_path)[0] + '.parquet'
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(xlsx_path):
+        return pd.read_parquet(parquet_path)
+    
+    df = pd.read_excel(xlsx_path)
+    try:
+        df.to_parquet(parquet_path, index=False, compression='zstd')
+    except Exception as e:
+        logging.warning(f"Could not write Parquet copy of {xlsx_path}: {e}")
+    return df
+
+def write_workbook(df, xlsx_path, sheet_name='Sheet1'):
+    """Write a DataFrame to Excel, streaming rows to disk and skipping per-cell URL detection"""
+    with pd.ExcelWriter(xlsx_path, engine='xlsxwriter',
+                        engine_kwargs={'options': {'constant_memory': True, 'strings_to_urls': False}}) as writer:
+        df.to_excel(writer, index=False, sheet_name=sheet_name)
+
+# Crawl state shared by the quality and resume crawlers: one row per document, keyed by URL
+CRAWL_DB = 'luatvietnam_crawl.db'
+DOC_COLUMNS = ['title', 'url', 'publication_date', 'document_type', 'source_page', 'crawled_date']
+
+def open_crawl_db(path=CRAWL_DB):
+    """Open the crawl state database, creating the tables on first use"""
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE IF NOT EXISTS docs (
+        url TEXT PRIMARY KEY, title TEXT, publication_date TEXT,
+        document_type TEXT, source_page TEXT, crawled_date TEXT)''')
+    conn.execute('CREATE INDEX IF NOT EXISTS docs_source_page ON docs (source_page)')
+    conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+    return conn
+
+def _get_meta(conn, key, default=None):
+    row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else default
+
+def _set_meta(conn, values):
+    with conn:
+        conn.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                         [(key, str(value)) for key, value in values.items()])
+
+def _workbook_key(name, xlsx_path):
+    """Meta key for one workbook, so each Excel collection tracks its own sync state"""
+    return f"{name}:{os.path.abspath(xlsx_path)}"
+
+def insert_documents(conn, documents):
+    """Store documents in one transaction; URLs already stored are ignored"""
+    placeholders = ', '.join('?' * len(DOC_COLUMNS))
+    with conn:
+        conn.executemany(f"INSERT OR IGNORE INTO docs ({', '.join(DOC_COLUMNS)}) VALUES ({placeholders})",
+                         [tuple(doc.get(column, '') for column in DOC_COLUMNS) for doc in documents])
+
+def sync_workbook(conn, xlsx_path):
+    """Import the Excel collection into the database if it changed since the last sync"""
+    if not os.path.exists(xlsx_path):
+        return
+    
+    mtime = os.path.getmtime(xlsx_path)
+    if _get_meta(conn, _workbook_key('workbook_mtime', xlsx_path)) == str(mtime):
+        return
+    
+    try:
+        df = read_excel_cached(xlsx_path).reindex(columns=DOC_COLUMNS).fillna('').astype(str)
+    except Exception as e:
+        print(f"❌ Error loading {xlsx_path}: {e}")
+        return
+    
+    insert_documents(conn, df.to_dict('records'))
+    _set_meta(conn, {_workbook_key('workbook_mtime', xlsx_path): mtime,
+                     _workbook_key('workbook_rows', xlsx_path): df['url'].nunique()})
+    print(f"✅ Imported {len(df):,} documents from {xlsx_path} into {CRAWL_DB}")
+
+def count_documents(conn):
+    """Number of documents stored in the database"""
+    return conn.execute('SELECT COUNT(*) FROM docs').fetchone()[0]
+
+def has_unexported_rows(conn, xlsx_path):
+    """Whether the database holds documents the given Excel collection does not have yet"""
+    return count_documents(conn) > int(_get_meta(conn, _workbook_key('workbook_rows', xlsx_path), 0))
+
+def export_workbook(conn, xlsx_path):
+    """Write every stored document to the Excel collection"""
+    df = pd.read_sql_query(f"SELECT {', '.join(DOC_COLUMNS)} FROM docs ORDER BY rowid", conn)
+    write_workbook(df, xlsx_path)
+    _set_meta(conn, {_workbook_key('workbook_mtime', xlsx_path): os.path.getmtime(xlsx_path),
+                     _workbook_key('workbook_rows', xlsx_path): len(df)})
+    return df
+
+class TokenBucket:
+    """Async token bucket: allows short bursts while capping the average request rate"""
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+    
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+    
+    def pause(self, seconds):
+        """Hold all requests back, e.g. when the server asks us to slow down"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
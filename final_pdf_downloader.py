@@ -7,27 +7,85 @@ Based on our discovery that actual PDF URLs are in the page source after authent
 import time
 import os
 import re
+import json
+import hashlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 
+# Collects PDF links on the static host straight from the live DOM
+PDF_LINKS_JS = """
+return Array.from(document.querySelectorAll('a[href*=".pdf"]'))
+    .map(a => a.href)
+    .filter(h => h.includes('static.luatvietnam.vn'));
+"""
+
 class LuatVietnamPDFDownloader:
-    def __init__(self, username, password, download_folder="final_downloads"):
+    def __init__(self, username, password, download_folder="final_downloads", max_workers=4, download_workers=8):
         self.username = username
         self.password = password
         self.download_folder = download_folder
+        self.max_workers = max_workers
+        self.download_workers = download_workers
+        self.lock = threading.Lock()
+        
+        # Cap in-flight downloads per host so the pool doesn't burst the CDN
+        self._host_limits = {}
+        
+        # Selenium is only used to log in; documents are fetched over this session
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        }
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        
+        # Keep-alive connection pool shared by page fetches and PDF downloads
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=max(32, max_workers + download_workers),
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._auth_lock = threading.Lock()
+        
+        # One logged-in browser kept alive for the whole batch (see close())
+        self._driver = None
+        self._driver_lock = threading.Lock()
+        self._auth_generation = 0  # bumped on every successful bootstrap
+        
+        # PDF URL patterns, most specific first
+        self._pdf_patterns = [
+            re.compile(r'https://static\.luatvietnam\.vn/tai-file-[^"\']*\.pdf'),  # Download URLs
+            re.compile(r'https://static\.luatvietnam\.vn/[^"\']*\.pdf')  # Any PDF URL
+        ]
         
         # Ensure download folder exists
         if not os.path.exists(download_folder):
             os.makedirs(download_folder)
         
         print(f"📁 Download folder: {download_folder}")
+        
+        # document URL -> {"filename", "sha1"} for every completed download
+        self.manifest_file = os.path.join(download_folder, "manifest.json")
+        self.manifest = self.load_manifest()
+        
+        # document URL -> extracted PDF URL, reused by later runs after a HEAD check
+        self.pdf_url_cache_file = os.path.join(download_folder, "pdf_urls.json")
+        self.pdf_url_cache = self.load_json(self.pdf_url_cache_file)
     
     def setup_driver(self):
         """Setup Chrome driver with proper configuration"""
@@ -38,18 +96,88 @@ class LuatVietnamPDFDownloader:
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
         
+        # Only HTML and the login form matter - skip the GUI and heavy assets
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2
+        })
+        chrome_options.page_load_strategy = "eager"
+        
         service = Service(ChromeDriverManager().install())
         driver = webdriver.Chrome(service=service, options=chrome_options)
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         
         return driver
     
-    def login_and_extract_pdf_url(self, document_url):
-        """Login and extract the actual PDF URL from page source"""
-        
-        driver = self.setup_driver()
+    def has_auth_cookie(self, driver):
+        """Check whether the driver already holds a login cookie"""
+        return any(c['name'].lower().startswith('auth') for c in driver.get_cookies())
+    
+    def login(self, driver):
+        """Submit credentials through the download popup on the current page"""
         wait = WebDriverWait(driver, 20)
         
+        # Look for login trigger element and click it
+        login_triggers = [
+            "//a[contains(@class, 'lawsVnLogin')]",
+            "//span[contains(@class, 'lawsVnLogin')]",
+            "//a[contains(text(), 'Tải văn bản')]",
+            "//span[contains(text(), 'Tải văn bản')]"
+        ]
+        
+        login_triggered = False
+        for trigger_xpath in login_triggers:
+            try:
+                trigger_element = driver.find_element(By.XPATH, trigger_xpath)
+                driver.execute_script("arguments[0].click();", trigger_element)
+                print(f"✅ Triggered login with: {trigger_xpath}")
+                login_triggered = True
+                time.sleep(2)
+                break
+            except:
+                continue
+        
+        if not login_triggered:
+            print("⚠️ Could not find login trigger, attempting direct access...")
+        
+        # Handle login popup
+        try:
+            username_field = wait.until(EC.presence_of_element_located((By.ID, "customer_name")))
+            password_field = driver.find_element(By.ID, "password_login")
+            
+            username_field.clear()
+            username_field.send_keys(self.username)
+            password_field.clear()
+            password_field.send_keys(self.password)
+            password_field.send_keys('\n')
+            
+            print("✅ Login credentials submitted")
+            
+            # Wait for the auth cookie instead of a fixed delay
+            try:
+                wait.until(lambda d: self.has_auth_cookie(d))
+            except TimeoutException:
+                print("⚠️ No auth cookie after login, continuing anyway")
+            return True
+        
+        except Exception as e:
+            print(f"❌ Login failed: {e}")
+            return False
+    
+    def find_pdf_url(self, html):
+        """Return the first PDF URL in the given HTML, or None"""
+        for pattern in self._pdf_patterns:
+            match = pattern.search(html)
+            if match:
+                return match.group(0)
+        return None
+    
+    def extract_pdf_url_logged_in(self, driver, document_url):
+        """Extract the PDF URL with a driver, logging in only if needed"""
         try:
             print(f"🔍 Processing: {document_url}")
             
@@ -57,153 +185,340 @@ class LuatVietnamPDFDownloader:
             driver.get(document_url)
             time.sleep(3)
             
-            # Look for login trigger element and click it
-            login_triggers = [
-                "//a[contains(@class, 'lawsVnLogin')]",
-                "//span[contains(@class, 'lawsVnLogin')]",
-                "//a[contains(text(), 'Tải văn bản')]",
-                "//span[contains(text(), 'Tải văn bản')]"
-            ]
+            # Skip the login popup if the driver already holds a session
+            if not self.has_auth_cookie(driver):
+                if not self.login(driver):
+                    return None
             
-            login_triggered = False
-            for trigger_xpath in login_triggers:
-                try:
-                    trigger_element = driver.find_element(By.XPATH, trigger_xpath)
-                    driver.execute_script("arguments[0].click();", trigger_element)
-                    print(f"✅ Triggered login with: {trigger_xpath}")
-                    login_triggered = True
-                    time.sleep(2)
-                    break
-                except:
-                    continue
+            # Ask the browser for PDF anchors instead of serializing the whole DOM
+            pdf_links = driver.execute_script(PDF_LINKS_JS) or []
+            pdf_url = next((link for link in pdf_links if '/tai-file-' in link), pdf_links[0] if pdf_links else None)
+            
+            # Backup: the URL may only appear in scripts or attributes other than href
+            if not pdf_url:
+                pdf_url = self.find_pdf_url(driver.page_source)
             
-            if not login_triggered:
-                print("⚠️ Could not find login trigger, attempting direct access...")
+            if pdf_url:
+                print(f"✅ Found PDF URL: {pdf_url}")
+                return pdf_url
+            
+            print("❌ No PDF URL found in page source")
+            return None
+            
+        except Exception as e:
+            print(f"❌ Error processing {document_url}: {e}")
+            return None
+    
+    def get_driver(self):
+        """Return the cached browser, starting it on first use"""
+        if self._driver is None:
+            self._driver = self.setup_driver()
+        return self._driver
+    
+    def login_and_extract_pdf_url(self, document_url):
+        """Extract the PDF URL with the cached browser, logging in on first use"""
+        with self._driver_lock:
+            return self.extract_pdf_url_logged_in(self.get_driver(), document_url)
+    
+    def _bootstrap_session(self, document_url):
+        """Log in with the cached browser and copy its cookies into self.session"""
+        print("🔑 Logging in to bootstrap HTTP session...")
+        with self._driver_lock:
+            driver = self.get_driver()
+            driver.get(document_url)
+            time.sleep(3)
+            if not self.login(driver):
+                return False
             
-            # Handle login popup
+            cookies = driver.get_cookies()
+            for cookie in cookies:
+                self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+            self._auth_generation += 1
+            print(f"✅ Session bootstrapped with {len(cookies)} cookies")
+            return True
+    
+    def close(self):
+        """Shut down the cached browser"""
+        if self._driver is not None:
             try:
-                username_field = wait.until(EC.presence_of_element_located((By.ID, "customer_name")))
-                password_field = driver.find_element(By.ID, "password_login")
-                
-                username_field.clear()
-                username_field.send_keys(self.username)
-                password_field.clear()
-                password_field.send_keys(self.password)
-                password_field.send_keys('\n')
-                
-                print("✅ Login credentials submitted")
-                time.sleep(5)  # Wait for login to complete
-                
-            except Exception as e:
-                print(f"❌ Login failed: {e}")
-                return None
-            
-            # Extract PDF URL from page source
-            page_source = driver.page_source
-            
-            # Multiple patterns to find PDF URLs
-            patterns = [
-                r'https://static\.luatvietnam\.vn/tai-file-[^"\']*\.pdf',  # Download URLs
-                r'https://static\.luatvietnam\.vn/[^"\']*\.pdf'  # Any PDF URL
-            ]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, page_source)
-                if matches:
-                    # Return the first match
-                    pdf_url = matches[0]
+                self._driver.quit()
+            except Exception:
+                pass
+            self._driver = None
+    
+    def _refresh_session(self, document_url, seen_generation):
+        """Re-run the login bootstrap unless another worker already did"""
+        with self._auth_lock:
+            if self._auth_generation != seen_generation:
+                return True
+            return self._bootstrap_session(document_url)
+    
+    def _needs_login(self, response):
+        """Detect a response served to an anonymous visitor"""
+        return (response.status_code == 401 or
+                'dang-nhap' in response.url or 'login' in response.url.lower() or
+                'lawsVnLogin' in response.text)
+    
+    def extract_pdf_url(self, document_url):
+        """Fetch the document page over the authenticated session and extract its PDF URL"""
+        try:
+            print(f"🔍 Processing: {document_url}")
+            
+            for attempt in range(2):
+                generation = self._auth_generation
+                response = self.session.get(document_url, timeout=30)
+                pdf_url = self.find_pdf_url(response.text)
+                if pdf_url:
                     print(f"✅ Found PDF URL: {pdf_url}")
                     return pdf_url
+                
+                # Session expired - log in again and retry once
+                if attempt == 0 and self._needs_login(response):
+                    print("🔄 Session not authenticated, logging in again...")
+                    if not self._refresh_session(document_url, generation):
+                        return None
+                    continue
+                
+                # Still anonymous after re-login - let the browser render the page
+                if self._needs_login(response):
+                    print("🌐 Falling back to the logged-in browser...")
+                    return self.login_and_extract_pdf_url(document_url)
+                break
             
             print("❌ No PDF URL found in page source")
             return None
-            
+        
         except Exception as e:
             print(f"❌ Error processing {document_url}: {e}")
             return None
-            
-        finally:
-            driver.quit()
     
-    def download_pdf(self, pdf_url, filename):
-        """Download PDF directly using requests"""
+    def load_json(self, path):
+        """Load a JSON dict from the download folder, or an empty one"""
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"⚠️ Could not read {path}: {e}")
+        return {}
+    
+    def save_json(self, path, data):
+        """Atomically write a JSON dict"""
+        temp_file = path + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_file, path)
+    
+    def load_manifest(self):
+        """Load the record of completed downloads"""
+        return self.load_json(self.manifest_file)
+    
+    def save_manifest(self):
+        """Atomically write the record of completed downloads"""
+        self.save_json(self.manifest_file, self.manifest)
+    
+    def probe_pdf_url(self, pdf_url):
+        """Cheap HEAD check that a PDF URL is still downloadable"""
+        try:
+            response = self.session.head(pdf_url, allow_redirects=True, timeout=15)
+            return response.status_code == 200 and 'html' not in response.headers.get('Content-Type', '')
+        except requests.exceptions.RequestException:
+            return False
+    
+    def is_downloaded(self, document_url):
+        """Check whether a document's PDF is on disk and matches its manifest entry"""
+        entry = self.manifest.get(document_url)
+        if not entry:
+            return False
+        
+        filepath = os.path.join(self.download_folder, entry['filename'])
+        if not os.path.exists(filepath):
+            return False
+        if 'size' in entry:
+            return os.path.getsize(filepath) == entry['size']
+        
+        # Entries from before sizes were recorded: fall back to the checksum
+        return self.file_sha1(filepath) == entry.get('sha1')
+    
+    def file_sha1(self, filepath):
+        """SHA-1 of a file on disk"""
+        sha1 = hashlib.sha1()
+        with open(filepath, 'rb') as f:
+            for block in iter(lambda: f.read(1024*1024), b''):
+                sha1.update(block)
+        return sha1.hexdigest()
+    
+    def _host_semaphore(self, url):
+        """Return the per-host download semaphore for a URL"""
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.Semaphore(8)
+            return self._host_limits[host]
+    
+    def download_pdf(self, pdf_url, filename, document_url=None):
+        """Download PDF over the pooled session"""
         
         filepath = os.path.join(self.download_folder, filename)
+        part_path = filepath + '.part'
         
         try:
             print(f"📥 Downloading: {filename}")
             
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            }
-            
-            response = requests.get(pdf_url, headers=headers, stream=True, timeout=30)
-            response.raise_for_status()
-            
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            # Stream into a .part file, hashing as we go; only a complete download gets the real name
+            sha1 = hashlib.sha1()
+            with self._host_semaphore(pdf_url):
+                with self.session.get(pdf_url, headers=self.headers, stream=True, timeout=30) as response:
+                    response.raise_for_status()
+                    
+                    response.raw.decode_content = True
+                    with open(part_path, 'wb') as f:
+                        for block in iter(lambda: response.raw.read(1024*1024), b''):
+                            sha1.update(block)
+                            f.write(block)
             
+            os.replace(part_path, filepath)
             file_size = os.path.getsize(filepath)
             print(f"✅ Downloaded: {filename} ({file_size:,} bytes)")
+            
+            if document_url:
+                with self.lock:
+                    self.manifest[document_url] = {'filename': filename, 'size': file_size, 'sha1': sha1.hexdigest()}
             return True
             
         except Exception as e:
             print(f"❌ Download failed for {filename}: {e}")
+            if os.path.exists(part_path):
+                os.remove(part_path)
             return False
     
+    def _document_worker(self, task_queue, total, downloads):
+        """Worker loop: pull documents off the queue and collect their PDF URLs"""
+        try:
+            while True:
+                try:
+                    index, document_title, document_url, safe_filename = task_queue.get_nowait()
+                except queue.Empty:
+                    break
+                
+                print(f"\n📄 [{index+1}/{total}] {document_title[:80]}...")
+                
+                # Fast path: a PDF URL extracted by an earlier run that still resolves
+                pdf_url = self.pdf_url_cache.get(document_url)
+                if pdf_url and self.probe_pdf_url(pdf_url):
+                    print(f"⚡ Reusing cached PDF URL: {pdf_url}")
+                else:
+                    # Extract PDF URL over the shared authenticated session
+                    pdf_url = self.extract_pdf_url(document_url)
+                    if pdf_url:
+                        with self.lock:
+                            self.pdf_url_cache[document_url] = pdf_url
+                
+                with self.lock:
+                    if pdf_url:
+                        downloads.append((safe_filename, pdf_url, document_url))
+                    else:
+                        self.failed_count += 1
+                
+                # Brief pause between documents
+                time.sleep(2)
+        except Exception as e:
+            print(f"❌ Worker stopped: {e}")
+    
     def process_documents(self, documents_df, limit=None):
         """Process documents from DataFrame and download PDFs"""
         
         if limit:
             documents_df = documents_df.head(limit)
         
-        print(f"📋 Processing {len(documents_df)} documents")
+        print(f"📋 Processing {len(documents_df)} documents with {self.max_workers} workers")
         print("="*60)
         
-        success_count = 0
-        failed_count = 0
+        self.success_count = 0
+        self.failed_count = 0
+        self.skipped_count = 0
         
-        for index, row in documents_df.iterrows():
-            document_title = row['title']
-            document_url = row['url']
-            
-            print(f"\n📄 [{index+1}/{len(documents_df)}] {document_title[:80]}...")
+        if documents_df.empty:
+            return
+        
+        # Create safe filenames for the whole batch at once; a short hash of the document URL
+        # keeps titles that sanitize to the same name from sharing one file in the download pool
+        url_hashes = documents_df['url'].astype(str).map(lambda url: hashlib.sha1(url.encode('utf-8')).hexdigest()[:8])
+        safe_filenames = (documents_df['title'].astype(str)
+                          .str.replace(r'[^\w\s-]', '', regex=True)
+                          .str.replace(r'[-\s]+', '_', regex=True)
+                          .str.slice(0, 100)  # Limit filename length
+                          + '_' + url_hashes + ".pdf")
+        
+        # Skip documents whose PDF is already on disk and recorded in the manifest
+        done = [self.is_downloaded(url) for url in documents_df['url']]
+        for filename in safe_filenames[done]:
+            print(f"⏭️ Skipped: {filename}")
+        self.skipped_count = sum(done)
+        pending = [not d for d in done]
+        documents_df, safe_filenames = documents_df[pending], safe_filenames[pending]
+        
+        if documents_df.empty:
+            print(f"⏭️ All {self.skipped_count} documents already downloaded")
+            return
+        
+        try:
+            # Single Selenium login for the whole batch
+            if not self._bootstrap_session(documents_df['url'].iloc[0]):
+                print("❌ Could not log in - aborting")
+                return
             
-            # Create safe filename
-            safe_filename = re.sub(r'[^\w\s-]', '', document_title)
-            safe_filename = re.sub(r'[-\s]+', '_', safe_filename)
-            safe_filename = safe_filename[:100] + ".pdf"  # Limit filename length
+            task_queue = queue.Queue()
+            for index, task in enumerate(zip(documents_df['title'], documents_df['url'], safe_filenames)):
+                task_queue.put((index, *task))
             
-            # Extract PDF URL
-            pdf_url = self.login_and_extract_pdf_url(document_url)
+            # Phase 1: extract PDF URLs
+            downloads = []
+            workers = []
+            for _ in range(min(self.max_workers, len(documents_df))):
+                worker = threading.Thread(target=self._document_worker, args=(task_queue, len(documents_df), downloads))
+                worker.start()
+                workers.append(worker)
             
-            if pdf_url:
-                # Download PDF
-                if self.download_pdf(pdf_url, safe_filename):
-                    success_count += 1
-                else:
-                    failed_count += 1
-            else:
-                failed_count += 1
+            for worker in workers:
+                worker.join()
             
-            # Brief pause between documents
-            time.sleep(2)
+            # Phase 2: download the PDFs concurrently
+            print(f"\n📥 Downloading {len(downloads)} PDFs with {self.download_workers} workers")
+            with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+                futures = [executor.submit(self.download_pdf, pdf_url, filename, document_url)
+                           for filename, pdf_url, document_url in downloads]
+                for future in as_completed(futures):
+                    with self.lock:
+                        if future.result():
+                            self.success_count += 1
+                        else:
+                            self.failed_count += 1
+        finally:
+            self.close()
+            self.save_manifest()
+            self.save_json(self.pdf_url_cache_file, self.pdf_url_cache)
         
         print(f"\n🎯 SUMMARY:")
-        print(f"✅ Successfully downloaded: {success_count}")
-        print(f"❌ Failed: {failed_count}")
+        print(f"✅ Successfully downloaded: {self.success_count}")
+        print(f"⏭️ Skipped (already downloaded): {self.skipped_count}")
+        print(f"❌ Failed: {self.failed_count}")
         print(f"📁 Files saved to: {self.download_folder}")
 
 def main():
     """Test with a few documents first"""
     
-    # Load the document list
+    # Load the document list, preferring the Parquet copy written by the crawler
     try:
-        df = pd.read_excel("luatvietnam_partial_results.xlsx")
-        print(f"📊 Loaded {len(df)} documents from Excel file")
+        xlsx_path, parquet_path = "luatvietnam_partial_results.xlsx", "luatvietnam_partial_results.parquet"
+        if os.path.exists(parquet_path) and (not os.path.exists(xlsx_path) or
+                                             os.path.getmtime(parquet_path) >= os.path.getmtime(xlsx_path)):
+            df = pd.read_parquet(parquet_path)
+        else:
+            df = pd.read_excel(xlsx_path, engine='calamine')
+        print(f"📊 Loaded {len(df)} documents")
     except Exception as e:
-        print(f"❌ Could not load Excel file: {e}")
+        print(f"❌ Could not load document list: {e}")
         return
     
     # Initialize downloader
@@ -23,6 +23,34 @@ import re
 from datetime import datetime
 import os
 import json
+import html
+import csv
+import threading
+import asyncio
+import httpx
+from requests.adapters import HTTPAdapter
+from crawl_common import write_workbook
+
+# Document and pagination link patterns
+_DOC_RE = re.compile(r'/giao-thong/.*\.html')
+_PAGE_NUM_RE = re.compile(r'giao-thong-28-f(\d+)\.html')
+
+# Publication date near a document link
+_DATE_RE = re.compile(r'(\d{1,2}/\d{1,2}/\d{4})')
+_BAN_HANH_RE = re.compile(r'Ban hành:\s*(\d{1,2}/\d{1,2}/\d{4})')
+
+# Document link with its inner HTML (title, possibly wrapped in inline tags) and the first date within 400 chars after it
+_DOC_LINK_RE = re.compile(
+    r'<a\s[^>]*?href="([^"]*/giao-thong/[^"]+\.html)"[^>]*>(.*?)</a>'
+    r'(?:(?:(?!<a\s).){0,400}?(\d{1,2}/\d{1,2}/\d{4}))?',
+    re.DOTALL
+)
+# Every document anchor, however its href is quoted; a page where this count differs goes to the DOM
+_DOC_HREF_RE = re.compile(r'<a\s[^>]*?href=["\']?[^"\'\s>]*/giao-thong/[^"\'\s>]*\.html')
+_TAG_RE = re.compile(r'<[^>]+>')
+
+# Columns of a document record, in output order
+DOCUMENT_FIELDS = ['title', 'url', 'publication_date', 'document_type', 'source_page', 'crawled_date']
 
 # Configure logging
 logging.basicConfig(
@@ -35,72 +63,157 @@ logging.basicConfig(
 )
 
 class LuatVietnamCrawler:
-    def __init__(self):
+    def __init__(self, max_workers=8, min_interval=0.25):
         self.base_url = "https://luatvietnam.vn"
         self.start_url = "https://luatvietnam.vn/giao-thong-28-f1.html"
+        self.page_url_template = "https://luatvietnam.vn/giao-thong-28-f{}.html"
+        self.max_workers = max_workers
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         
         # Set up session headers to mimic a real browser
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'vi-VN,vi;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
+            # Includes 'br' only when brotli is installed, so responses can always be decoded
+            'Accept-Encoding': requests.utils.DEFAULT_ACCEPT_ENCODING,
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         })
         
         self.documents = []
+        self.lock = threading.Lock()
+        
+        # Append-only record of documents found during a crawl; an interrupted crawl resumes from it
+        self.progress_file = "luatvietnam_progress.csv"
+        self.crawled_pages = set()
+        
+        # Global rate limit shared by all fetch workers (seconds between request starts)
+        self.min_interval = min_interval
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
         
         # Error logging for crawler
-        self.crawler_error_log = "crawler_failed_urls.json"
+        # Failures are appended as JSON lines; the newest line per URL wins
+        self.crawler_error_log = "crawler_failed_urls.jsonl"
+        self.legacy_error_log = "crawler_failed_urls.json"
+        self._fail_fp = None
         self.failed_urls = self.load_failed_urls()
         
     def load_failed_urls(self):
-        """Load previously failed URLs for tracking"""
-        if os.path.exists(self.crawler_error_log):
+        """Load previously failed URLs for tracking, keyed by URL"""
+        failed_urls = {}
+        
+        # Older runs wrote the whole list as a single JSON document
+        if os.path.exists(self.legacy_error_log):
             try:
-                with open(self.crawler_error_log, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(self.legacy_error_log, 'r', encoding='utf-8') as f:
+                    for entry in json.load(f):
+                        failed_urls[entry['url']] = entry
             except:
-                return []
-        return []
+                pass
+        
+        if os.path.exists(self.crawler_error_log):
+            with open(self.crawler_error_log, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Partially written last line
+                    failed_urls[entry['url']] = entry
+        
+        return failed_urls
     
     def log_failed_url(self, url, error_message, error_type="crawling"):
         """Log failed URL with detailed information"""
-        failed_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "url": url,
-            "error": error_message,
-            "error_type": error_type,  # "crawling", "parsing", "pagination"
-            "retry_count": 0
-        }
+        with self.lock:
+            self._record_failed_url(url, error_message, error_type)
         
+        logging.error(f"Failed URL logged: {url} - {error_message}")
+    
+    def _record_failed_url(self, url, error_message, error_type):
+        """Update the failed URL map and append it to the log (caller holds self.lock)"""
         # Check if this URL already failed before
-        existing_entry = None
-        for entry in self.failed_urls:
-            if entry.get('url') == url:
-                existing_entry = entry
-                break
-        
-        if existing_entry:
-            existing_entry['retry_count'] += 1
-            existing_entry['timestamp'] = datetime.now().isoformat()
-            existing_entry['error'] = error_message
+        entry = self.failed_urls.get(url)
+        if entry:
+            entry['retry_count'] += 1
+            entry['timestamp'] = datetime.now().isoformat()
+            entry['error'] = error_message
         else:
-            self.failed_urls.append(failed_entry)
-        
-        # Save to file
-        with open(self.crawler_error_log, 'w', encoding='utf-8') as f:
-            json.dump(self.failed_urls, f, ensure_ascii=False, indent=2)
-        
-        logging.error(f"Failed URL logged: {url} - {error_message}")
+            entry = {
+                "timestamp": datetime.now().isoformat(),
+                "url": url,
+                "error": error_message,
+                "error_type": error_type,  # "crawling", "parsing", "pagination"
+                "retry_count": 0
+            }
+            self.failed_urls[url] = entry
+        
+        # Append to file
+        if self._fail_fp is None:
+            self._fail_fp = open(self.crawler_error_log, 'a', encoding='utf-8')
+        self._fail_fp.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._fail_fp.flush()
+    
+    def compact(self):
+        """Rewrite the failure log with one line per URL"""
+        with self.lock:
+            if self._fail_fp is not None:
+                self._fail_fp.close()
+                self._fail_fp = None
+            
+            temp_file = self.crawler_error_log + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                for entry in self.failed_urls.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            os.replace(temp_file, self.crawler_error_log)
+            
+            # Legacy entries now live in the JSONL log
+            if os.path.exists(self.legacy_error_log):
+                os.remove(self.legacy_error_log)
+    
+    def _reserve_slot(self):
+        """Reserve the next request slot and return how long to wait for it"""
+        with self._rate_lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_request_at)
+            self._next_request_at = start_at + self.min_interval * random.uniform(0.5, 1.5)
+        return start_at - now
+    
+    def wait_for_slot(self):
+        """Block until the shared rate limiter allows another request"""
+        delay = self._reserve_slot()
+        if delay > 0:
+            time.sleep(delay)
+    
+    async def get_page_async(self, client, semaphore, url):
+        """Async counterpart of get_page for the bulk listing crawl"""
+        async with semaphore:
+            try:
+                delay = self._reserve_slot()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                
+                response = await client.get(url)
+                response.raise_for_status()
+                
+                logging.info(f"Successfully fetched: {url}")
+                return response.text
+            
+            except httpx.HTTPError as e:
+                error_msg = f"Error fetching {url}: {e}"
+                logging.error(error_msg)
+                self.log_failed_url(url, str(e), "crawling")
+                return None
         
     def get_page(self, url):
         """Get page content with error handling and rate limiting"""
         try:
-            # Random delay to avoid being blocked
-            time.sleep(random.uniform(1, 3))
+            # Space requests out across all workers to avoid being blocked
+            self.wait_for_slot()
             
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
@@ -114,14 +227,38 @@ class LuatVietnamCrawler:
             self.log_failed_url(url, str(e), "crawling")
             return None
     
+    def _parse(self, html_content):
+        """Parse a page once so every consumer can share the tree"""
+        return BeautifulSoup(html_content, 'lxml')
+    
     def extract_documents_from_page(self, html_content, page_url):
         """Extract document information from a single page"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        documents = []
+        
+        # Fast path: one regex pass over the raw HTML
+        matches = list(_DOC_LINK_RE.finditer(html_content))
+        
+        # Some anchors didn't match the regex - fall back to walking the DOM for this page
+        if len(matches) != len(_DOC_HREF_RE.findall(html_content)):
+            return self.extract_documents_with_soup(self._parse(html_content), page_url)
+        
+        for match in matches:
+            title = ' '.join(html.unescape(_TAG_RE.sub('', match.group(2))).split())
+            if len(title) < 10:  # Skip short/empty titles
+                continue
+            
+            doc_url = urljoin(self.base_url, html.unescape(match.group(1)))
+            documents.append(self.build_document(title, doc_url, match.group(3), page_url))
+        
+        return documents
+    
+    def extract_documents_with_soup(self, soup, page_url):
+        """Extract document information by walking the parsed page"""
         documents = []
         
         # Find all document entries - they appear to be in specific patterns
         # Looking for links that match the document pattern
-        doc_links = soup.find_all('a', href=re.compile(r'/giao-thong/.*\.html'))
+        doc_links = soup.find_all('a', href=_DOC_RE)
         
         for link in doc_links:
             try:
@@ -139,41 +276,16 @@ class LuatVietnamCrawler:
                 if parent:
                     # Look for date pattern in parent element
                     date_text = parent.get_text()
-                    date_match = re.search(r'(\d{1,2}/\d{1,2}/\d{4})', date_text)
+                    date_match = _DATE_RE.search(date_text)
                     if date_match:
                         pub_date = date_match.group(1)
                     else:
                         # Look for "Ban hành:" pattern
-                        ban_hanh_match = re.search(r'Ban hành:\s*(\d{1,2}/\d{1,2}/\d{4})', date_text)
+                        ban_hanh_match = _BAN_HANH_RE.search(date_text)
                         if ban_hanh_match:
                             pub_date = ban_hanh_match.group(1)
                 
-                # Extract document type/category from URL
-                doc_type = "Giao thông"
-                if '/nghi-dinh' in doc_url:
-                    doc_type = "Nghị định"
-                elif '/thong-tu' in doc_url:
-                    doc_type = "Thông tư"
-                elif '/quyet-dinh' in doc_url:
-                    doc_type = "Quyết định"
-                elif '/cong-van' in doc_url:
-                    doc_type = "Công văn"
-                elif '/luat' in doc_url:
-                    doc_type = "Luật"
-                elif '/chi-thi' in doc_url:
-                    doc_type = "Chỉ thị"
-                
-                doc_info = {
-                    'title': title,
-                    'url': doc_url,
-                    'publication_date': pub_date,
-                    'document_type': doc_type,
-                    'source_page': page_url,
-                    'crawled_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-                
-                documents.append(doc_info)
-                logging.info(f"Extracted: {title[:50]}...")
+                documents.append(self.build_document(title, doc_url, pub_date, page_url))
                 
             except Exception as e:
                 error_msg = f"Error extracting document info from {page_url}: {e}"
@@ -184,110 +296,42 @@ class LuatVietnamCrawler:
         
         return documents
     
-    def find_pagination_links(self, html_content):
-        """Find pagination links to crawl additional pages"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        pagination_links = []
-        
-        # Pattern 1: Direct page number links (f1.html, f2.html, etc.)
-        page_links = soup.find_all('a', href=re.compile(r'giao-thong-28-f\d+\.html'))
-        for link in page_links:
-            href = link.get('href')
-            if href:
-                full_url = urljoin(self.base_url, href)
-                pagination_links.append(full_url)
-        
-        # Pattern 2: Look for pagination container
-        pagination_containers = soup.find_all(['div', 'ul', 'nav'], class_=re.compile(r'pag|page', re.I))
-        for container in pagination_containers:
-            links = container.find_all('a', href=True)
-            for link in links:
-                href = link.get('href')
-                if href and 'giao-thong' in href and 'f' in href:
-                    full_url = urljoin(self.base_url, href)
-                    pagination_links.append(full_url)
-        
-        # Pattern 3: "Next" or navigation links
-        next_patterns = ['Next', 'Tiếp', 'Tiếp theo', '»', '>', 'Trang sau']
-        for pattern in next_patterns:
-            next_links = soup.find_all('a', string=re.compile(pattern, re.I))
-            for link in next_links:
-                href = link.get('href')
-                if href and 'giao-thong' in href:
-                    full_url = urljoin(self.base_url, href)
-                    pagination_links.append(full_url)
-        
-        # Pattern 4: Look for numbered links (1, 2, 3, etc.)
-        number_links = soup.find_all('a', string=re.compile(r'^\d+$'))
-        for link in number_links:
-            href = link.get('href')
-            if href and 'giao-thong' in href:
-                full_url = urljoin(self.base_url, href)
-                pagination_links.append(full_url)
-        
-        # Remove duplicates and current page
-        unique_links = []
-        for link in pagination_links:
-            if link not in unique_links:
-                unique_links.append(link)
-        
-        return unique_links
+    def build_document(self, title, doc_url, pub_date, page_url):
+        """Build a document record, deriving the type from its URL"""
+        # Extract document type/category from URL
+        doc_type = "Giao thông"
+        if '/nghi-dinh' in doc_url:
+            doc_type = "Nghị định"
+        elif '/thong-tu' in doc_url:
+            doc_type = "Thông tư"
+        elif '/quyet-dinh' in doc_url:
+            doc_type = "Quyết định"
+        elif '/cong-van' in doc_url:
+            doc_type = "Công văn"
+        elif '/luat' in doc_url:
+            doc_type = "Luật"
+        elif '/chi-thi' in doc_url:
+            doc_type = "Chỉ thị"
+        
+        doc_info = {
+            'title': title,
+            'url': doc_url,
+            'publication_date': pub_date,
+            'document_type': doc_type,
+            'source_page': page_url,
+            'crawled_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        
+        logging.info(f"Extracted: {title[:50]}...")
+        return doc_info
     
     def crawl_all_pages(self):
         """Crawl all pages starting from the main traffic law page"""
         logging.info("Starting LuatVietnam.vn Traffic Law Crawler")
         logging.info(f"Starting URL: {self.start_url}")
         
-        visited_urls = set()
-        urls_to_visit = [self.start_url]
-        
-        while urls_to_visit:
-            current_url = urls_to_visit.pop(0)
-            
-            if current_url in visited_urls:
-                continue
-                
-            logging.info(f"Crawling page: {current_url}")
-            visited_urls.add(current_url)
-            
-            # Get page content
-            html_content = self.get_page(current_url)
-            if not html_content:
-                continue
-            
-            # Extract documents from current page
-            page_documents = self.extract_documents_from_page(html_content, current_url)
-            self.documents.extend(page_documents)
-            
-            logging.info(f"Found {len(page_documents)} documents on this page")
-            logging.info(f"Total documents so far: {len(self.documents)}")
-            
-            # Progress report every 10 pages
-            if len(visited_urls) % 10 == 0:
-                print(f"📊 Progress: Crawled {len(visited_urls)} pages, found {len(self.documents)} documents")
-            
-            # Save progress periodically
-            if len(self.documents) % 500 == 0 and len(self.documents) > 0:
-                self.save_to_excel(f"luatvietnam_progress_{len(self.documents)}.xlsx")
-                print(f"💾 Progress saved: {len(self.documents)} documents")
-            
-            # Find pagination links for more pages
-            # Remove artificial limit to get all documents
-            try:
-                pagination_links = self.find_pagination_links(html_content)
-                for link in pagination_links:
-                    if link not in visited_urls and link not in urls_to_visit:
-                        urls_to_visit.append(link)
-                        logging.info(f"Added to queue: {link}")
-            except Exception as e:
-                error_msg = f"Failed to find pagination links on {current_url}: {e}"
-                logging.error(error_msg)
-                self.log_failed_url(current_url, error_msg, "pagination")
-            
-            # Safety check to prevent infinite loops
-            if len(visited_urls) > 850:  # Allow for all 824 pages plus some margin
-                logging.warning("Reached safety limit of 850 pages")
-                break
+        self.load_progress()
+        asyncio.run(self._crawl())
         
         logging.info(f"Crawling completed! Total documents found: {len(self.documents)}")
         
@@ -297,9 +341,96 @@ class LuatVietnamCrawler:
             print(f"⚠️ {len(self.failed_urls)} URLs failed during crawling - check {self.crawler_error_log}")
         else:
             print("✅ No URLs failed during crawling!")
-            
+        
         return self.documents
     
+    def load_progress(self):
+        """Replay documents streamed by an interrupted crawl, so their pages are not fetched again"""
+        if not os.path.exists(self.progress_file):
+            return
+        
+        with open(self.progress_file, 'r', encoding='utf-8', newline='') as progress:
+            documents = list(csv.DictReader(progress))
+        
+        self.documents.extend(documents)
+        self.crawled_pages.update(doc['source_page'] for doc in documents)
+        logging.info(f"Resuming: {len(documents)} documents from {len(self.crawled_pages)} pages in {self.progress_file}")
+    
+    def clear_progress(self):
+        """Drop the progress file once a completed crawl is safely in the workbook"""
+        if os.path.exists(self.progress_file):
+            os.remove(self.progress_file)
+    
+    def find_max_page(self, html_content):
+        """Return the highest listing page number linked from a page"""
+        return max(map(int, _PAGE_NUM_RE.findall(html_content)), default=1)
+    
+    async def _fetch_with_url(self, client, semaphore, url):
+        """Fetch a page and return it together with its URL"""
+        return url, await self.get_page_async(client, semaphore, url)
+    
+    async def _crawl(self):
+        """Crawl every listing page over a single multiplexed HTTP/2 connection"""
+        # Connection-specific headers are not allowed over HTTP/2
+        headers = {k: v for k, v in self.session.headers.items() if k.lower() != 'connection'}
+        limits = httpx.Limits(max_connections=16)
+        semaphore = asyncio.Semaphore(self.max_workers)
+        
+        # Stream documents to CSV as they are found instead of rewriting Excel snapshots;
+        # append so an earlier run's progress survives, with the header only in a new file
+        write_header = not os.path.exists(self.progress_file) or os.path.getsize(self.progress_file) == 0
+        with open(self.progress_file, 'a', encoding='utf-8', newline='') as progress:
+            progress_writer = csv.DictWriter(progress, fieldnames=DOCUMENT_FIELDS)
+            if write_header:
+                progress_writer.writeheader()
+            
+            async with httpx.AsyncClient(http2=True, limits=limits, headers=headers, timeout=30, follow_redirects=True) as client:
+                # Page 1 tells us how many listing pages there are
+                html_content = await self.get_page_async(client, semaphore, self.start_url)
+                if not html_content:
+                    return
+                if self.start_url not in self.crawled_pages:
+                    self._ingest_page(html_content, self.start_url, progress_writer)
+                
+                crawled_pages = 1
+                last_page = 1
+                # Pages crawled by an earlier run already widened the pagination window that far
+                max_page = max(self.find_max_page(html_content), self.find_max_page(' '.join(self.crawled_pages)))
+                logging.info(f"Found {max_page} listing pages")
+                
+                # Pagination may show only a window of pages, so extend the range
+                # whenever a fetched page links beyond it
+                while max_page > last_page:
+                    urls = [self.page_url_template.format(n) for n in range(last_page + 1, max_page + 1)]
+                    urls = [url for url in urls if url not in self.crawled_pages]
+                    last_page = max_page
+                    
+                    tasks = [self._fetch_with_url(client, semaphore, url) for url in urls]
+                    for task in asyncio.as_completed(tasks):
+                        current_url, html_content = await task
+                        crawled_pages += 1
+                        if not html_content:
+                            continue
+                        
+                        self._ingest_page(html_content, current_url, progress_writer)
+                        max_page = max(max_page, self.find_max_page(html_content))
+                        
+                        # Progress report every 10 pages
+                        if crawled_pages % 10 == 0:
+                            print(f"📊 Progress: Crawled {crawled_pages} pages, found {len(self.documents)} documents")
+                            progress.flush()
+                
+                print(f"📊 Progress: Crawled {crawled_pages} pages, found {len(self.documents)} documents")
+    
+    def _ingest_page(self, html_content, page_url, progress_writer):
+        """Extract a listing page's documents and record them"""
+        page_documents = self.extract_documents_from_page(html_content, page_url)
+        self.documents.extend(page_documents)
+        progress_writer.writerows(page_documents)
+        
+        logging.info(f"Found {len(page_documents)} documents on {page_url}")
+        logging.info(f"Total documents so far: {len(self.documents)}")
+    
     def save_to_excel(self, filename="luatvietnam_traffic_laws.xlsx"):
         """Save extracted documents to Excel file"""
         if not self.documents:
@@ -321,8 +452,14 @@ class LuatVietnamCrawler:
         df = df.sort_values('pub_date_parsed', ascending=False, na_position='last')
         df = df.drop('pub_date_parsed', axis=1)
         
-        # Save to Excel
-        df.to_excel(filename, index=False, sheet_name='Traffic Laws')
+        # Save to Excel, streaming rows (already sorted) instead of building the workbook in memory
+        write_workbook(df, filename, sheet_name='Traffic Laws')
+        
+        # Parquet copy for fast loading by the downloaders
+        try:
+            df.to_parquet(os.path.splitext(filename)[0] + '.parquet', index=False)
+        except Exception as e:
+            logging.warning(f"Could not write Parquet copy of {filename}: {e}")
         
         logging.info(f"Saved {len(df)} documents to {filename}")
         
@@ -368,7 +505,7 @@ class LuatVietnamCrawler:
         
         # Group by error type
         error_types = {}
-        for entry in self.failed_urls:
+        for entry in self.failed_urls.values():
             error_type = entry.get('error_type', 'unknown')
             if error_type not in error_types:
                 error_types[error_type] = []
@@ -382,7 +519,7 @@ class LuatVietnamCrawler:
         print(f"\n📝 DETAILED FAILED URLS:")
         print("-" * 80)
         
-        for i, entry in enumerate(self.failed_urls, 1):
+        for i, entry in enumerate(self.failed_urls.values(), 1):
             print(f"{i:3d}. {entry.get('url', 'Unknown')}")
             print(f"     Error Type: {entry.get('error_type', 'unknown')}")
             print(f"     Error: {entry.get('error', 'Unknown')}")
@@ -400,10 +537,10 @@ class LuatVietnamCrawler:
         print("="*80)
         
         # Extract URLs to retry
-        retry_urls = [entry['url'] for entry in self.failed_urls]
+        retry_urls = list(self.failed_urls)
         
         # Clear previous failures to start fresh
-        self.failed_urls = []
+        self.failed_urls = {}
         
         # Retry each URL
         visited_urls = set()
@@ -424,6 +561,9 @@ class LuatVietnamCrawler:
             self.documents.extend(page_documents)
             
             print(f"  ✅ Found {len(page_documents)} documents")
+        
+        # Persist the cleared log so only URLs that failed again remain
+        self.compact()
 
 def main():
     """Main function to run the crawler"""
@@ -457,8 +597,9 @@ def main():
         documents = crawler.crawl_all_pages()
         
         if documents:
-            # Save to Excel
+            # Save to Excel; the finished workbook supersedes the progress file
             filename = crawler.save_to_excel()
+            crawler.clear_progress()
             print(f"\n✅ Crawling completed successfully!")
             print(f"📁 Results saved to: {filename}")
         else:
@@ -476,6 +617,8 @@ def main():
             filename = crawler.save_to_excel("luatvietnam_partial_results.xlsx")
             print(f"💾 Partial results saved to: {filename}")
         print(f"❌ Error occurred: {e}")
+    finally:
+        crawler.compact()
 
 if __name__ == "__main__":
     main()
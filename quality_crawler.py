@@ -1,10 +1,12 @@
-import requests
-import pandas as pd
-from bs4 import BeautifulSoup
-import time
+import asyncio
+import httpx
+import lxml.html
 import logging
+import re
 from datetime import datetime
 import os
+from crawl_common import (open_crawl_db, insert_documents, sync_workbook,
+                          has_unexported_rows, export_workbook, write_workbook, TokenBucket)
 
 # Set up logging
 logging.basicConfig(
@@ -16,124 +18,173 @@ logging.basicConfig(
     ]
 )
 
+AUXILIARY_KEYWORDS = [
+    'VB liên quan', 'Thuộc tính', 'Tải về', 'Tóm tắt', 
+    'Hiệu lực', 'Lược đồ', 'Tiếng Anh', 'Văn bản được hợp nhất',
+    'VB được hợp nhất', 'Related documents', 'Properties'
+]
+
+# One alternation regex per check: a single C-level scan instead of a Python loop over patterns
+_AUX_RE = re.compile('|'.join(map(re.escape, AUXILIARY_KEYWORDS)))
+_HREF_OK = re.compile(r'\.html|id=|van-ban')
+_NAV_TEXTS = frozenset(['xem thêm', 'chi tiết', 'more', 'details'])
+
 def is_auxiliary_content(title):
     """Filter out auxiliary/navigation content"""
-    auxiliary_keywords = [
-        'VB liên quan', 'Thuộc tính', 'Tải về', 'Tóm tắt', 
-        'Hiệu lực', 'Lược đồ', 'Tiếng Anh', 'Văn bản được hợp nhất',
-        'VB được hợp nhất', 'Related documents', 'Properties'
-    ]
-    
     title_clean = title.strip()
     
-    # Check if it's auxiliary content
-    if any(keyword in title_clean for keyword in auxiliary_keywords):
-        return True
-    
-    # Check if it's too short to be a real document title
+    # Cheapest checks first: too short to be a real document title
     if len(title_clean) < 10:
         return True
     
     # Check if it's just navigation text
-    if title_clean.lower() in ['xem thêm', 'chi tiết', 'more', 'details']:
+    if title_clean.lower() in _NAV_TEXTS:
         return True
-        
-    return False
+    
+    # Check if it's auxiliary content
+    return _AUX_RE.search(title_clean) is not None
+
+COLLECTION_FILE = 'luatvietnam_complete_collection.xlsx'
+REQUESTS_PER_SECOND = 8  # Same politeness cap as the resume crawler
+
+def make_client(max_concurrency=8):
+    """Create the shared keep-alive client used for the whole crawl"""
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive'
+    }
+    limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+    transport = httpx.AsyncHTTPTransport(retries=3, limits=limits)  # Retries connection failures
+    return httpx.AsyncClient(headers=headers, transport=transport, timeout=10, follow_redirects=True)
+
+async def fetch_pages(client, semaphore, limiter, urls, max_retries=3):
+    """Fetch listing pages concurrently; returns HTML (or the error) in input order"""
+    async def fetch(url):
+        try:
+            for attempt in range(max_retries):
+                async with semaphore:
+                    await limiter.acquire()
+                    response = await client.get(url)
+                if response.status_code not in (429, 503):
+                    break
+                # Server asked us to slow down - pause every request, then retry this one
+                retry_after = response.headers.get('Retry-After', '')
+                limiter.pause(int(retry_after) if retry_after.isdigit() else 2 ** (attempt + 1))
+            response.raise_for_status()
+            return response.content
+        except Exception as e:
+            return e
+    
+    return await asyncio.gather(*(fetch(url) for url in urls))
 
 def crawl_quality_documents():
     """Crawl with quality filtering to get only real legal documents"""
+    asyncio.run(_crawl_quality_documents())
+
+async def _crawl_quality_documents():
+    """Scan listing pages over one connection pool for the whole run"""
     print("🎯 QUALITY CRAWLER: Finding real legal documents only")
     print("=" * 60)
     
-    # Load existing data
-    try:
-        existing_df = pd.read_excel('luatvietnam_complete_collection.xlsx')
-        existing_documents = set(existing_df['title'].tolist())
-        print(f"✅ Loaded {len(existing_documents):,} existing documents")
-    except:
-        existing_documents = set()
+    # Load existing data from the crawl database, importing the Excel collection if it changed
+    conn = open_crawl_db()
+    sync_workbook(conn, COLLECTION_FILE)
+    # Key on URL: distinct legal documents can share the same short title
+    seen_urls = {url for (url,) in conn.execute('SELECT url FROM docs')}
+    if seen_urls:
+        print(f"✅ Loaded {len(seen_urls):,} existing documents")
+    else:
         print("📝 Starting fresh collection")
     
     new_documents = []
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    })
+    checkpointed = 0
+    semaphore = asyncio.Semaphore(8)
+    limiter = TokenBucket(REQUESTS_PER_SECOND)
     
     # Start from where we left off, but focus on earlier pages that might have more content
     print("🔍 Scanning pages 1-50 for missed quality documents...")
     
-    for page in range(1, 51):  # Focus on content-rich early pages
-        urls_to_try = [
-            f"https://luatvietnam.vn/giao-thong-28-f1.html?page={page}",
-            f"https://luatvietnam.vn/giao-thong-28-f2.html?page={page}",
-        ]
-        
-        for url in urls_to_try:
-            try:
-                print(f"📋 Scanning page {page}: {url.split('/')[-1]}")
-                response = session.get(url, timeout=10)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Find all document links
-                doc_links = soup.find_all('a', href=True)
-                page_documents = 0
-                
-                for link in doc_links:
-                    title = link.get_text(strip=True)
-                    href = link.get('href', '')
-                    
-                    # Skip if no title or href
-                    if not title or not href:
-                        continue
+    async with make_client() as client:
+        for batch_start in range(1, 51, 10):  # Focus on content-rich early pages
+            # Fetch 10 pages (both listing variants) concurrently, then filter in order
+            pages = range(batch_start, batch_start + 10)
+            urls = [
+                (page, url)
+                for page in pages
+                for url in (
+                    f"https://luatvietnam.vn/giao-thong-28-f1.html?page={page}",
+                    f"https://luatvietnam.vn/giao-thong-28-f2.html?page={page}",
+                )
+            ]
+            results = await fetch_pages(client, semaphore, limiter, [url for _, url in urls])
+            
+            for (page, url), content in zip(urls, results):
+                try:
+                    print(f"📋 Scanning page {page}: {url.split('/')[-1]}")
+                    if isinstance(content, Exception):
+                        raise content
                     
-                    # Skip auxiliary content
-                    if is_auxiliary_content(title):
-                        continue
+                    tree = lxml.html.fromstring(content)
                     
-                    # Skip if already exists
-                    if title in existing_documents:
-                        continue
+                    # Find all document links straight from the lxml tree
+                    doc_links = tree.xpath('//a[@href]')
+                    page_documents = 0
+                    crawled_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')  # One timestamp per page
                     
-                    # Skip if not a document link
-                    if not any(pattern in href for pattern in ['.html', 'id=', 'van-ban']):
-                        continue
+                    for link in doc_links:
+                        title = link.text_content().strip()
+                        href = link.get('href', '')
+                        
+                        # Skip if no title or href
+                        if not title or not href:
+                            continue
+                        
+                        # Skip auxiliary content
+                        if is_auxiliary_content(title):
+                            continue
+                        
+                        # Skip if not a document link
+                        if not _HREF_OK.search(href):
+                            continue
+                        
+                        # This looks like a real legal document
+                        full_url = href if href.startswith('http') else f"https://luatvietnam.vn{href}"
+                        
+                        # Skip if already exists
+                        if full_url in seen_urls:
+                            continue
+                        
+                        doc_data = {
+                            'title': title,
+                            'url': full_url,
+                            'publication_date': '',
+                            'document_type': 'Legal Document',
+                            'source_page': url,
+                            'crawled_date': crawled_date
+                        }
+                        
+                        new_documents.append(doc_data)
+                        seen_urls.add(full_url)  # Prevent duplicates within this session
+                        page_documents += 1
+                        
+                        print(f"   ✅ Found: {title[:60]}...")
                     
-                    # This looks like a real legal document
-                    full_url = href if href.startswith('http') else f"https://luatvietnam.vn{href}"
+                    print(f"   📊 Found {page_documents} quality documents on this page")
                     
-                    doc_data = {
-                        'title': title,
-                        'url': full_url,
-                        'publication_date': '',
-                        'document_type': 'Legal Document',
-                        'source_page': url,
-                        'crawled_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    }
-                    
-                    new_documents.append(doc_data)
-                    existing_documents.add(title)  # Prevent duplicates within this session
-                    page_documents += 1
-                    
-                    print(f"   ✅ Found: {title[:60]}...")
-                
-                print(f"   📊 Found {page_documents} quality documents on this page")
-                time.sleep(1)  # Be respectful
-                
-            except Exception as e:
-                print(f"   ❌ Error on {url}: {str(e)}")
-                continue
-        
-        # Save progress every 10 pages
-        if page % 10 == 0 and new_documents:
-            save_progress(new_documents, existing_df if 'existing_df' in locals() else None)
-            print(f"💾 Progress saved at page {page}: {len(new_documents)} new documents")
+                except Exception as e:
+                    print(f"   ❌ Error on {url}: {str(e)}")
+                    continue
+            
+            # Checkpoint every 10 pages by committing only the new rows
+            if len(new_documents) > checkpointed:
+                insert_documents(conn, new_documents[checkpointed:])
+                checkpointed = len(new_documents)
+                print(f"💾 Progress saved at page {pages[-1]}: {len(new_documents)} new documents")
     
-    # Final save
-    if new_documents:
-        final_df = save_progress(new_documents, existing_df if 'existing_df' in locals() else None)
+    # Final save, also exporting rows committed by an earlier run that never got exported
+    if has_unexported_rows(conn, COLLECTION_FILE):
+        final_df = save_progress(conn)
         print(f"\n🎉 QUALITY CRAWLING COMPLETE!")
         print(f"📊 Found {len(new_documents)} new quality documents")
         print(f"📁 Total collection: {len(final_df)} documents")
@@ -141,23 +192,14 @@ def crawl_quality_documents():
     else:
         print("\n📋 No new quality documents found")
 
-def save_progress(new_documents, existing_df):
-    """Save progress to Excel file"""
-    new_df = pd.DataFrame(new_documents)
-    
-    if existing_df is not None:
-        # Combine with existing data
-        final_df = pd.concat([existing_df, new_df], ignore_index=True)
-    else:
-        final_df = new_df
-    
-    # Remove any duplicates that might have slipped through
-    final_df = final_df.drop_duplicates(subset=['title'], keep='first')
+def save_progress(conn):
+    """Export the crawl database to the Excel collection"""
+    # URLs are the primary key, so the export needs no drop_duplicates
+    final_df = export_workbook(conn, COLLECTION_FILE)
     
     # Save to Excel
     backup_filename = f"luatvietnam_quality_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    final_df.to_excel(backup_filename, index=False)
-    final_df.to_excel('luatvietnam_complete_collection.xlsx', index=False)
+    write_workbook(final_df, backup_filename)
     
     print(f"💾 Saved {len(final_df)} documents to Excel")
     return final_df
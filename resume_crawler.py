@@ -12,17 +12,19 @@ Features:
 - Prevents duplicate document collection
 """
 
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import time
+from selectolax.parser import HTMLParser
 import random
 import logging
-from urllib.parse import urljoin, urlparse, parse_qs
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 import re
 from datetime import datetime
 import os
 import json
+import asyncio
+import httpx
+from concurrent.futures import ProcessPoolExecutor
+from crawl_common import (open_crawl_db, insert_documents, sync_workbook, count_documents,
+                          has_unexported_rows, export_workbook, TokenBucket)
 
 # Configure logging
 logging.basicConfig(
@@ -34,79 +36,206 @@ logging.basicConfig(
     ]
 )
 
+BASE_URL = "https://luatvietnam.vn"
+
+def absolute_url(href):
+    """Resolve a site-relative link without going through urljoin"""
+    if href.startswith('http'):
+        return href
+    if href.startswith('//'):
+        return 'https:' + href
+    return BASE_URL + (href if href.startswith('/') else '/' + href)
+
+# Listing pages crawled for every page number
+LISTING_URLS = (
+    "https://luatvietnam.vn/giao-thong-28-f1.html",
+    "https://luatvietnam.vn/giao-thong-28-f2.html",
+    "https://luatvietnam.vn/giao-thong-28-f6.html"
+)
+
+# Query parameters that only toggle summaries and don't change the listing
+IGNORED_QUERY_PARAMS = {'ShowSapo'}
+
+def _canonical(url):
+    """Normalize a listing URL so equivalent pagination variants compare equal"""
+    parts = urlsplit(url)
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if k not in IGNORED_QUERY_PARAMS))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path.rstrip('/'), query, ''))
+
+# Article link patterns, combined so the tree is walked once per page
+_DOCUMENT_SELECTOR = ', '.join([
+    'h2.title-luat a',
+    'h3.title-luat a',
+    '.title-luat a',
+    '.item-search h2 a',
+    '.item-search h3 a',
+    'h2 a[href*="/giao-thong/"]',
+    'h3 a[href*="/giao-thong/"]',
+    'a[href*="/giao-thong/"]'
+])
+
+# Link texts of document tabs that are not document titles
+AUXILIARY_TITLES = {'Thuộc tính', 'VB liên quan', 'VB được hợp nhất'}
+
+# Date next to a document link, then common date patterns anywhere on the page
+_NEAR_DATE_RE = re.compile(r'(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{4})')
+_PAGE_DATE_RES = [re.compile(p) for p in (
+    r'(\d{1,2}\/\d{1,2}\/\d{4})',
+    r'(\d{1,2}\-\d{1,2}\-\d{4})',
+    r'(\d{4}\/\d{1,2}\/\d{1,2})',
+    r'(\d{4}\-\d{1,2}\-\d{1,2})'
+)]
+
+# Document type -> title keywords, in priority order; one precompiled alternation per type
+_DOC_TYPE_KEYWORDS = {
+    'Luật': ['luật', 'law'],
+    'Nghị định': ['nghị định', 'nđ-cp'],
+    'Thông tư': ['thông tư', 'tt-'],
+    'Quyết định': ['quyết định', 'qđ-'],
+    'Công văn': ['công văn'],
+    'Chỉ thị': ['chỉ thị'],
+    'Thông báo': ['thông báo'],
+    'Kế hoạch': ['kế hoạch']
+}
+_DOC_TYPE_RES = [(doc_type, re.compile('|'.join(map(re.escape, keywords))))
+                 for doc_type, keywords in _DOC_TYPE_KEYWORDS.items()]
+
+def extract_documents_from_page(html_content, source_url):
+    """Extract document information from a single page (top-level so it can run in a worker process)"""
+    tree = HTMLParser(html_content)
+    documents = []
+    crawled_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')  # One timestamp per page
+    
+    # One pass over all selectors: keep the first titled link per URL,
+    # skipping auxiliary tabs that point at the same document
+    documents_raw = {}
+    page_date = None
+    for link in tree.css(_DOCUMENT_SELECTOR):
+        href = link.attributes.get('href')
+        if not href or '/giao-thong/' not in href:
+            continue
+        
+        full_url = absolute_url(href)
+        if full_url in documents_raw:
+            continue
+        
+        title = link.text(strip=True)
+        if not title or title in AUXILIARY_TITLES:
+            continue
+        
+        documents_raw[full_url] = {'title': title, 'element': link}
+    
+    # Extract document info for each unique link
+    for link_url, raw in documents_raw.items():
+        try:
+            title, link_element = raw['title'], raw['element']
+            
+            # Try the link's own container first; the page-wide date is the same
+            # for every link, so it is searched at most once per page
+            pub_date = extract_publication_date(link_element)
+            if pub_date is None:
+                if page_date is None:
+                    page_date = extract_page_date(tree)
+                pub_date = page_date
+            
+            # Determine document type from title
+            doc_type = determine_document_type(title)
+            
+            documents.append({
+                'title': title,
+                'url': link_url,
+                'publication_date': pub_date,
+                'document_type': doc_type,
+                'source_page': source_url,
+                'crawled_date': crawled_date
+            })
+            
+            logging.info(f"Extracted: {title[:50]}...")
+        
+        except Exception as e:
+            logging.error(f"Error extracting document: {e}")
+            continue
+    
+    return documents
+
+def extract_publication_date(link_element):
+    """Extract publication date from the element wrapping the link"""
+    parent = link_element.parent
+    if parent:
+        date_match = _NEAR_DATE_RE.search(parent.text())
+        if date_match:
+            return date_match.group(1)
+    return None
+
+def extract_page_date(tree):
+    """Extract a publication date from the page body, or today's date"""
+    page_text = tree.body.text() if tree.body else ''
+    
+    # Look for common date patterns in the page
+    for pattern in _PAGE_DATE_RES:
+        match = pattern.search(page_text)
+        if match:
+            return match.group(1)
+    
+    return datetime.now().strftime('%d/%m/%Y')
+
+def determine_document_type(title):
+    """Determine document type from title"""
+    # First type in priority order found anywhere in the title wins
+    title_lower = title.lower()
+    return next((doc_type for doc_type, pattern in _DOC_TYPE_RES if pattern.search(title_lower)), 'Khác')
+
 class ResumeCrawler:
-    def __init__(self, existing_excel_file="luatvietnam_complete_collection.xlsx"):
-        self.base_url = "https://luatvietnam.vn"
+    def __init__(self, existing_excel_file="luatvietnam_complete_collection.xlsx", max_concurrency=8, requests_per_second=8,
+                 parse_workers=None):
+        self.base_url = BASE_URL
         self.existing_file = existing_excel_file
-        self.session = requests.Session()
+        self.max_concurrency = max_concurrency  # Concurrent requests to luatvietnam.vn
+        self.requests_per_second = requests_per_second
+        self.parse_workers = parse_workers or os.cpu_count()  # Processes parsing HTML while requests are in flight
         
-        # Set up session headers
-        self.session.headers.update({
+        # Request headers shared by every page fetch
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'vi-VN,vi;q=0.9,en;q=0.8',
             'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
-        })
+        }
         
-        # Load existing documents and find processed pages
-        self.existing_documents = self.load_existing_documents()
+        # Crawl state lives in SQLite: the Excel collection is imported when it changes,
+        # new documents are committed as they are found and exported once per run
+        self.db = open_crawl_db()
+        sync_workbook(self.db, self.existing_file)
+        self.existing_count = count_documents(self.db)
         self.processed_pages = self.find_processed_pages()
         self.new_documents = []
+        self.keep_backups = 3
+        
+        # URLs already collected, so new documents are de-duplicated as they arrive
+        self._seen_urls = {url for (url,) in self.db.execute('SELECT url FROM docs')}
         
         print(f"📊 RESUME CRAWLER INITIALIZATION:")
-        print(f"   - Existing documents: {len(self.existing_documents):,}")
+        print(f"   - Existing documents: {self.existing_count:,}")
         print(f"   - Processed pages: {len(self.processed_pages):,}")
         print(f"   - Ready to resume crawling...")
     
-    def load_existing_documents(self):
-        """Load existing documents from Excel file"""
-        if not os.path.exists(self.existing_file):
-            print(f"⚠️ No existing file found: {self.existing_file}")
-            return pd.DataFrame()
-        
-        try:
-            df = pd.read_excel(self.existing_file)
-            print(f"✅ Loaded {len(df):,} existing documents from {self.existing_file}")
-            return df
-        except Exception as e:
-            print(f"❌ Error loading existing file: {e}")
-            return pd.DataFrame()
-    
     def find_processed_pages(self):
         """Analyze source_page column to find which pages have been processed"""
-        if self.existing_documents.empty:
-            return set()
-        
-        processed_pages = set()
-        
-        # Extract page information from source_page column
-        for _, row in self.existing_documents.iterrows():
-            source_page = row.get('source_page', '')
-            if pd.notna(source_page):
-                # Try to extract page number from source_page
-                # Examples: "https://luatvietnam.vn/giao-thong-28-f1.html?page=1"
-                try:
-                    if 'page=' in source_page:
-                        page_num = source_page.split('page=')[1].split('&')[0]
-                        processed_pages.add(int(page_num))
-                    elif source_page.endswith('f1.html'):
-                        processed_pages.add(1)  # Main page
-                except:
-                    continue
+        # Extract page numbers from source_page in SQL
+        # Examples: "https://luatvietnam.vn/giao-thong-28-f1.html?page=1"
+        processed_pages = {page for (page,) in self.db.execute(
+            "SELECT DISTINCT CAST(substr(source_page, instr(source_page, 'page=') + 5) AS INTEGER) "
+            "FROM docs WHERE instr(source_page, 'page=') > 0")}
+        if self.db.execute("SELECT 1 FROM docs WHERE source_page LIKE '%f1.html' LIMIT 1").fetchone():
+            processed_pages.add(1)  # Main page
         
         print(f"📋 Found processed pages: {min(processed_pages) if processed_pages else 'None'} to {max(processed_pages) if processed_pages else 'None'}")
         return processed_pages
     
     def generate_unprocessed_urls(self):
         """Generate URLs for pages that haven't been processed yet"""
-        base_urls = [
-            "https://luatvietnam.vn/giao-thong-28-f1.html",
-            "https://luatvietnam.vn/giao-thong-28-f2.html",
-            "https://luatvietnam.vn/giao-thong-28-f6.html"
-        ]
-        
         unprocessed_urls = []
         
         # Find the range of pages to process
@@ -124,155 +253,40 @@ class ResumeCrawler:
             if page_num in self.processed_pages:
                 continue  # Skip already processed pages
             
-            for base_url in base_urls:
-                # Add different page variations
-                variations = [
-                    f"{base_url}?page={page_num}",
-                    f"{base_url}?page={page_num}&ShowSapo=0",
-                    f"{base_url}?page={page_num}&ShowSapo=1",
-                    f"{base_url}?ShowSapo=0&page={page_num}",
-                    f"{base_url}?ShowSapo=1&page={page_num}"
-                ]
-                
-                for url in variations:
-                    unprocessed_urls.append(url)
+            # ShowSapo and query-order variants return the same listing, so only
+            # the canonical URL is requested
+            for base_url in LISTING_URLS:
+                unprocessed_urls.append(f"{base_url}?page={page_num}")
         
         print(f"📋 Generated {len(unprocessed_urls):,} unprocessed URLs to crawl")
         return unprocessed_urls
     
-    def get_page(self, url, max_retries=3):
+    async def get_page(self, client, semaphore, limiter, url, max_retries=3):
         """Fetch page content with retry logic"""
         for attempt in range(max_retries):
             try:
-                # Random delay between requests
-                time.sleep(random.uniform(1, 3))
-                
-                response = self.session.get(url, timeout=15)
+                async with semaphore:
+                    await limiter.acquire()
+                    response = await client.get(url, timeout=15)
                 
                 if response.status_code == 200:
-                    return response.text
-                else:
-                    logging.warning(f"HTTP {response.status_code} for {url}")
-                    
-            except Exception as e:
-                logging.error(f"Attempt {attempt + 1} failed for {url}: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(random.uniform(2, 5))
-        
-        return None
-    
-    def extract_documents_from_page(self, html_content, source_url):
-        """Extract document information from a single page"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        documents = []
-        
-        # Find all article links - look for various patterns
-        selectors = [
-            'h2.title-luat a',
-            'h3.title-luat a', 
-            '.title-luat a',
-            '.item-search h2 a',
-            '.item-search h3 a',
-            'h2 a[href*="/giao-thong/"]',
-            'h3 a[href*="/giao-thong/"]',
-            'a[href*="/giao-thong/"]'
-        ]
-        
-        found_links = set()
-        
-        for selector in selectors:
-            links = soup.select(selector)
-            for link in links:
-                href = link.get('href')
-                if href and '/giao-thong/' in href:
-                    full_url = urljoin(self.base_url, href)
-                    found_links.add(full_url)
-        
-        # Extract document info for each unique link
-        for link_url in found_links:
-            try:
-                # Extract title
-                link_element = soup.find('a', href=lambda x: x and link_url.endswith(x) if x else False)
-                if not link_element:
-                    continue
+                    return str(response.url), response.text
                 
-                title = link_element.get_text(strip=True)
-                if not title or title in ['Thuộc tính', 'VB liên quan', 'VB được hợp nhất']:
+                logging.warning(f"HTTP {response.status_code} for {url}")
+                if response.status_code in (429, 503):
+                    # Server asked us to slow down - pause every request, not just this one
+                    retry_after = response.headers.get('Retry-After', '')
+                    limiter.pause(int(retry_after) if retry_after.isdigit() else 2 ** (attempt + 1))
                     continue
-                
-                # Try to extract publication date from various sources
-                pub_date = self.extract_publication_date(link_element, soup)
-                
-                # Determine document type from title
-                doc_type = self.determine_document_type(title)
-                
-                documents.append({
-                    'title': title,
-                    'url': link_url,
-                    'publication_date': pub_date,
-                    'document_type': doc_type,
-                    'source_page': source_url,
-                    'crawled_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                })
-                
-                logging.info(f"Extracted: {title[:50]}...")
-                
+                    
             except Exception as e:
-                logging.error(f"Error extracting document: {e}")
-                continue
+                logging.error(f"Attempt {attempt + 1} failed for {url}: {e}")
+            
+            # Exponential backoff only after a failure
+            if attempt < max_retries - 1:
+                await asyncio.sleep(2 ** attempt + random.uniform(0, 1))
         
-        return documents
-    
-    def extract_publication_date(self, link_element, soup):
-        """Extract publication date from various page elements"""
-        # Try multiple strategies to find publication date
-        
-        # Look for date near the link
-        parent = link_element.parent
-        if parent:
-            date_text = parent.get_text()
-            date_match = re.search(r'(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{4})', date_text)
-            if date_match:
-                return date_match.group(1)
-        
-        # Look for common date patterns in the page
-        date_patterns = [
-            r'(\d{1,2}\/\d{1,2}\/\d{4})',
-            r'(\d{1,2}\-\d{1,2}\-\d{4})',
-            r'(\d{4}\/\d{1,2}\/\d{1,2})',
-            r'(\d{4}\-\d{1,2}\-\d{1,2})'
-        ]
-        
-        page_text = soup.get_text()
-        for pattern in date_patterns:
-            matches = re.findall(pattern, page_text)
-            if matches:
-                return matches[0]
-        
-        return datetime.now().strftime('%d/%m/%Y')
-    
-    def determine_document_type(self, title):
-        """Determine document type from title"""
-        title_lower = title.lower()
-        
-        if any(word in title_lower for word in ['luật', 'law']):
-            return 'Luật'
-        elif any(word in title_lower for word in ['nghị định', 'nđ-cp']):
-            return 'Nghị định'
-        elif any(word in title_lower for word in ['thông tư', 'tt-']):
-            return 'Thông tư'
-        elif any(word in title_lower for word in ['quyết định', 'qđ-']):
-            return 'Quyết định'
-        elif any(word in title_lower for word in ['công văn']):
-            return 'Công văn'
-        elif any(word in title_lower for word in ['chỉ thị']):
-            return 'Chỉ thị'
-        elif any(word in title_lower for word in ['thông báo']):
-            return 'Thông báo'
-        elif any(word in title_lower for word in ['kế hoạch']):
-            return 'Kế hoạch'
-        else:
-            return 'Khác'
+        return url, None
     
     def crawl_unprocessed_pages(self, max_pages=200):
         """Crawl only unprocessed pages"""
@@ -285,68 +299,97 @@ class ResumeCrawler:
             return []
         
         # Limit the number of pages to process in this session
-        urls_to_process = unprocessed_urls[:max_pages * 5]  # 5 variations per page
+        urls_to_process = unprocessed_urls[:max_pages * len(LISTING_URLS)]  # One URL per listing per page
         
-        print(f"🎯 Processing {len(urls_to_process):,} URLs (estimated {len(urls_to_process)//5} pages)")
+        print(f"🎯 Processing {len(urls_to_process):,} URLs (estimated {len(urls_to_process)//len(LISTING_URLS)} pages)")
+        
+        asyncio.run(self._crawl_urls(urls_to_process))
+        
+        logging.info(f"Resume crawling completed! Found {len(self.new_documents)} new documents")
+        return self.new_documents
+    
+    async def _crawl_urls(self, urls):
+        """Fetch URLs concurrently and extract documents as pages arrive"""
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limiter = TokenBucket(self.requests_per_second)
         
         processed_count = 0
+        seen_canonical = set()  # Final (post-redirect) listing URLs already ingested
+        loop = asyncio.get_running_loop()
         
-        for i, url in enumerate(urls_to_process):
-            logging.info(f"Crawling: {url}")
-            
-            # Get page content
-            html_content = self.get_page(url)
+        async def fetch_and_parse(client, pool, url):
+            url, html_content = await self.get_page(client, semaphore, limiter, url)
             if not html_content:
-                continue
-            
-            # Extract documents from page
-            page_documents = self.extract_documents_from_page(html_content, url)
-            self.new_documents.extend(page_documents)
-            
-            processed_count += 1
-            
-            logging.info(f"Found {len(page_documents)} documents on this page")
-            logging.info(f"Total new documents so far: {len(self.new_documents)}")
+                return url, None
             
-            # Progress report every 10 pages
-            if processed_count % 10 == 0:
-                print(f"📊 Progress: Processed {processed_count} URLs, found {len(self.new_documents)} new documents")
+            # Several requests may redirect to the same listing page
+            canonical_url = _canonical(url)
+            if canonical_url in seen_canonical:
+                return url, None
+            seen_canonical.add(canonical_url)
             
-            # Save progress every 100 new documents
-            if len(self.new_documents) % 100 == 0 and len(self.new_documents) > 0:
-                self.save_progress()
-        
-        logging.info(f"Resume crawling completed! Found {len(self.new_documents)} new documents")
-        return self.new_documents
+            # Parse in a worker process so parsing overlaps with the requests still in flight
+            return url, await loop.run_in_executor(pool, extract_documents_from_page, html_content, url)
+        
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+            async with httpx.AsyncClient(headers=self.headers, limits=limits, follow_redirects=True) as client:
+                tasks = [fetch_and_parse(client, pool, url) for url in urls]
+                for task in asyncio.as_completed(tasks):
+                    url, extracted = await task
+                    logging.info(f"Crawled: {url}")
+                    if extracted is None:
+                        continue
+                    
+                    # Keep only documents not collected before
+                    page_documents = []
+                    for doc in extracted:
+                        if doc['url'] not in self._seen_urls:
+                            self._seen_urls.add(doc['url'])
+                            page_documents.append(doc)
+                    self.new_documents.extend(page_documents)
+                    self.checkpoint(page_documents)
+                    
+                    processed_count += 1
+                    
+                    logging.info(f"Found {len(page_documents)} new documents on this page")
+                    logging.info(f"Total new documents so far: {len(self.new_documents)}")
+                    
+                    # Progress report every 10 pages
+                    if processed_count % 10 == 0:
+                        print(f"📊 Progress: Processed {processed_count} URLs, found {len(self.new_documents)} new documents")
+    
+    def checkpoint(self, documents):
+        """Commit newly found documents to the crawl database"""
+        if documents:
+            insert_documents(self.db, documents)
+    
+    def prune_backups(self):
+        """Keep only the most recent collection backups"""
+        prefix = os.path.splitext(self.existing_file)[0] + "_backup_"
+        backups = sorted(entry.path for entry in os.scandir('.')
+                         if entry.name.startswith(os.path.basename(prefix)) and entry.name.endswith('.xlsx'))
+        for old_backup in backups[:-self.keep_backups]:
+            os.remove(old_backup)
     
     def save_progress(self):
-        """Save current progress by merging with existing documents"""
-        if not self.new_documents:
+        """Export the crawl database to the Excel collection"""
+        # Also picks up documents committed by an earlier run that never got exported
+        if not has_unexported_rows(self.db, self.existing_file):
             return
         
-        # Create DataFrame from new documents
-        new_df = pd.DataFrame(self.new_documents)
-        
-        # Combine with existing documents
-        if not self.existing_documents.empty:
-            combined_df = pd.concat([self.existing_documents, new_df], ignore_index=True)
-        else:
-            combined_df = new_df
-        
-        # Remove duplicates
-        combined_df = combined_df.drop_duplicates(subset=['url'], keep='first')
-        
         # Save to file
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_file = f"luatvietnam_complete_collection_backup_{timestamp}.xlsx"
+        backup_file = f"{os.path.splitext(self.existing_file)[0]}_backup_{timestamp}.xlsx"
         
-        # Backup existing file
+        # Backup existing file, keeping a small ring of recent backups
         if os.path.exists(self.existing_file):
             os.rename(self.existing_file, backup_file)
             print(f"💾 Backup created: {backup_file}")
+            self.prune_backups()
         
         # Save combined data
-        combined_df.to_excel(self.existing_file, index=False)
+        combined_df = export_workbook(self.db, self.existing_file)
         file_size = os.path.getsize(self.existing_file) / 1024 / 1024
         
         print(f"✅ Progress saved: {len(combined_df):,} total documents ({file_size:.1f} MB)")
@@ -363,7 +406,7 @@ def main():
         
         # Check if we need to continue crawling
         target_docs = 16463
-        current_docs = len(crawler.existing_documents)
+        current_docs = crawler.existing_count
         
         if current_docs >= target_docs * 0.95:  # 95% completion threshold
             print(f"🎉 Collection is {(current_docs/target_docs)*100:.1f}% complete!")
@@ -380,9 +423,9 @@ def main():
         
         # Start resume crawling
         new_documents = crawler.crawl_unprocessed_pages(max_pages=100)
+        crawler.save_progress()
         
         if new_documents:
-            crawler.save_progress()
             print(f"\n✅ Resume crawling completed!")
             print(f"📊 Found {len(new_documents):,} new documents")
         else:
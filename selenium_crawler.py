@@ -9,20 +9,25 @@ import logging
 import pandas as pd
 from datetime import datetime
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-import hashlib
+import lxml.html
+from lxml import etree
 import os
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import threading
+import asyncio
+import httpx
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.remote_connection import ChromeRemoteConnection
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException, WebDriverException
 import queue
+from crawl_common import read_excel_cached, write_workbook, TokenBucket
 
 # Configure logging
 logging.basicConfig(
@@ -34,15 +39,82 @@ logging.basicConfig(
     ]
 )
 
+BASE_URL = "https://luatvietnam.vn"
+
+def absolute_url(href):
+    """Resolve a site-relative link without going through urljoin"""
+    if href.startswith('http'):
+        return href
+    if href.startswith('//'):
+        return 'https:' + href
+    return BASE_URL + (href if href.startswith('/') else '/' + href)
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# Links whose href points at a document
+_DOCUMENT_HREF_XPATH = "//a[" + ' or '.join(f"contains(@href, '{path}')" for path in (
+    '/van-ban/', '/chi-thi/', '/thong-tu/', '/nghi-dinh/',
+    '/quyet-dinh/', '/luat/', '/cong-van/', '/thong-bao/'
+)) + "]"
+
+# Document link patterns as one precompiled XPath union, so each page is walked once
+_DOCUMENT_LINK_XPATH = ' | '.join([
+    _DOCUMENT_HREF_XPATH,
+    f"//*[{_has_class('doc-title')}]//a",
+    f"//*[{_has_class('document-item')}]//a",
+    f"//*[{_has_class('search-result')}]//a",
+    "//h3//a",
+    "//h4//a"
+])
+DOCUMENT_LINK_XPATH = etree.XPath(_DOCUMENT_LINK_XPATH)
+
+# Runs the same XPath inside Chrome and returns only [href, text] pairs,
+# so the page HTML never has to be serialized and parsed again in Python
+DOCUMENT_LINKS_JS = """
+const found = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+const links = [];
+for (let i = 0; i < found.snapshotLength; i++) {
+    const a = found.snapshotItem(i);
+    links.push([a.getAttribute('href'), a.textContent.trim()]);
+}
+return links;
+"""
+
+# Module-level so the HTTP path can run it in a worker process
+def extract_links(html):
+    """Return a listing page's document links as (href, text) pairs, or None for a JS-only shell"""
+    tree = lxml.html.fromstring(html)
+    
+    # A page without any links is a JS shell that needs a real browser
+    if tree.find('.//a[@href]') is None:
+        return None
+    return [(link.get('href'), link.text_content().strip()) for link in DOCUMENT_LINK_XPATH(tree)]
+
+# A listing page past the last real page has no document links at all
+HAS_DOCUMENTS_XPATH = etree.XPath(f"boolean({_DOCUMENT_HREF_XPATH})")
+
+# Columns of a crawled document, in spreadsheet order
+DOCUMENT_COLUMNS = ['title', 'url', 'summary', 'category', 'date', 'file_type', 'file_url']
+
+# Resources Chrome never needs to fetch to render listing links
+BLOCKED_RESOURCE_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg', '*.webp', '*.css',
+    '*.woff', '*.woff2', '*.ttf', '*.mp4',
+    '*google-analytics*', '*googletagmanager*', '*doubleclick*'
+]
+
 class FastSeleniumCrawler:
-    def __init__(self, max_workers=8, headless=True):
-        self.base_url = "https://luatvietnam.vn"
+    def __init__(self, max_workers=8, headless=True, requests_per_second=8):
+        self.base_url = BASE_URL
         self.documents = []
         self.processed_urls = set()
         self.failed_urls = []
         self.max_workers = max_workers
+        self.requests_per_second = requests_per_second
         self.headless = headless
-        self.lock = threading.Lock()
+        self.checkpoint_file = "selenium_checkpoint.jsonl"
+        self.driver_service = None  # One chromedriver shared by every Selenium worker
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
@@ -62,7 +134,8 @@ class FastSeleniumCrawler:
         self.chrome_options.add_argument('--disable-features=VizDisplayCompositor')
         self.chrome_options.add_argument('--window-size=1920,1080')
         
-        # Performance optimizations
+        # Performance optimizations; don't wait for subresources before reading the DOM
+        self.chrome_options.page_load_strategy = 'eager'
         prefs = {
             "profile.default_content_setting_values": {
                 "images": 2,  # Block images
@@ -76,11 +149,18 @@ class FastSeleniumCrawler:
         self.chrome_options.add_experimental_option("prefs", prefs)
         
     def create_driver(self):
-        """Create a new Chrome driver instance"""
+        """Open a new Chrome session on the shared chromedriver"""
         try:
-            driver = webdriver.Chrome(options=self.chrome_options)
+            # Attaching to the running chromedriver skips spawning a driver process per worker
+            driver = webdriver.Remote(command_executor=ChromeRemoteConnection(self.driver_service.service_url),
+                                      options=self.chrome_options)
             driver.set_page_load_timeout(30)
             driver.implicitly_wait(10)
+            
+            # Block heavy resources at the DevTools level; links only need the HTML and scripts
+            driver.execute('executeCdpCommand', {'cmd': 'Network.enable', 'params': {}})
+            driver.execute('executeCdpCommand', {'cmd': 'Network.setBlockedURLs',
+                                                 'params': {'urls': BLOCKED_RESOURCE_URLS}})
             return driver
         except Exception as e:
             logging.error(f"Failed to create Chrome driver: {e}")
@@ -88,37 +168,29 @@ class FastSeleniumCrawler:
     
     def load_existing_data(self):
         """Load existing crawled data from Excel files"""
-        excel_files = [f for f in os.listdir('.') if f.startswith('luatvietnam_complete_backup_') and f.endswith('.xlsx')]
+        # One directory scan; DirEntry caches the stat result used to pick the newest file
+        with os.scandir('.') as entries:
+            excel_files = [(entry.stat().st_ctime, entry.name) for entry in entries
+                           if entry.name.startswith('luatvietnam_complete_backup_') and entry.name.endswith('.xlsx')]
         
         if not excel_files:
             logging.info("No existing backup files found. Starting fresh.")
             return
-            
-        # Sort by creation time and pick the most recent
-        excel_files.sort(key=lambda x: os.path.getctime(x), reverse=True)
-        latest_file = excel_files[0]
+        
+        # Pick the most recently created file
+        latest_file = max(excel_files)[1]
         
         try:
-            df = pd.read_excel(latest_file)
+            df = read_excel_cached(latest_file)
             existing_docs = len(df)
             
             logging.info(f"📂 Loading existing data from {latest_file}")
             logging.info(f"📄 Found {existing_docs} existing documents")
             
-            # Convert to our format and track processed URLs
-            for _, row in df.iterrows():
-                doc = {
-                    'title': row['title'],
-                    'url': row['url'],
-                    'summary': row.get('summary', ''),
-                    'category': row.get('category', ''),
-                    'date': row.get('date', ''),
-                    'file_type': row.get('file_type', ''),
-                    'file_url': row.get('file_url', ''),
-                    'md5_hash': row.get('md5_hash', '')
-                }
-                self.documents.append(doc)
-                self.processed_urls.add(row['url'])
+            # Convert to our format and track processed URLs, column-wise
+            df = df.reindex(columns=DOCUMENT_COLUMNS, fill_value='')
+            self.documents.extend(df.to_dict('records'))
+            self.processed_urls.update(df['url'].tolist())
             
             logging.info(f"✅ Loaded {len(self.documents)} documents from backup")
             logging.info(f"📊 Progress: {len(self.documents)/16463*100:.1f}%")
@@ -127,9 +199,7 @@ class FastSeleniumCrawler:
             logging.error(f"❌ Error loading existing data: {e}")
     
     def generate_all_urls(self):
-        """Generate all possible page URLs for comprehensive crawling"""
-        urls = []
-        
+        """Return all possible page URLs for comprehensive crawling"""
         # Main category pages with different formats and parameters
         base_patterns = [
             "https://luatvietnam.vn/giao-thong-28.html",
@@ -140,94 +210,133 @@ class FastSeleniumCrawler:
             "https://luatvietnam.vn/tim-kiem.html?q=giao+thong"
         ]
         
-        # Generate paginated URLs (much wider range for completeness)
+        # Generate paginated URLs up to each listing's real last page; the ShowSapo
+        # variants only toggle summaries and list the same documents
+        urls = []
         for base in base_patterns:
-            for page in range(1, 1001):  # Test up to 1000 pages
-                if "search?" in base:
-                    urls.append(f"{base}&page={page}")
-                elif "tim-kiem.html?" in base:
-                    urls.append(f"{base}&page={page}")
-                else:
-                    # Multiple parameter combinations
-                    urls.extend([
-                        f"{base}?page={page}",
-                        f"{base}?page={page}&ShowSapo=0",
-                        f"{base}?page={page}&ShowSapo=1", 
-                        f"{base}?ShowSapo=0&page={page}",
-                        f"{base}?ShowSapo=1&page={page}"
-                    ])
-        
-        logging.info(f"🔗 Generated {len(urls)} URLs to crawl")
+            last_page = self._discover_last_page(base)
+            logging.info(f"🔗 {base}: {last_page} pages")
+            urls.extend(self.build_page_url(base, page) for page in range(1, last_page + 1))
+        
         return urls
     
+    def build_page_url(self, base_url, page_num):
+        """Build a page URL with proper parameters"""
+        if "search?" in base_url or "tim-kiem.html?" in base_url:
+            return f"{base_url}&page={page_num}"
+        return f"{base_url}?page={page_num}"
+    
+    def _discover_last_page(self, base_url, max_page=1000):
+        """Binary search for the last listing page that still has document links"""
+        last_page = 1
+        left, right = 1, max_page
+        
+        while left <= right:
+            mid = (left + right) // 2
+            try:
+                response = self.session.get(self.build_page_url(base_url, mid), timeout=10)
+                has_documents = (response.status_code == 200 and
+                                 HAS_DOCUMENTS_XPATH(lxml.html.fromstring(response.content)))
+            except Exception:
+                has_documents = False
+            
+            if has_documents:
+                last_page = mid
+                left = mid + 1
+            else:
+                right = mid - 1
+        
+        return last_page
+    
+    def build_documents(self, links):
+        """Build document records from (href, text) pairs of matched links"""
+        page_docs = []
+        
+        # Keep the first link with text for each document URL
+        found_links = {}
+        for href, text in links:
+            if href:
+                full_url = absolute_url(href)
+                if not found_links.get(full_url):
+                    found_links[full_url] = text
+        
+        # Process each document link
+        for doc_url, title in found_links.items():
+            if doc_url in self.processed_urls:
+                continue
+            
+            if title and len(title) > 10:  # Filter out very short titles
+                doc_info = {
+                    'title': title,
+                    'url': doc_url,
+                    'summary': '',
+                    'category': 'Giao thông',
+                    'date': '',
+                    'file_type': '',
+                    'file_url': ''
+                }
+                page_docs.append(doc_info)
+        
+        return page_docs
+    
+    async def fetch(self, client, limiter, parse_pool, url, max_retries=3):
+        """Fetch a listing page over HTTP; returns (url, page_docs, error, is_dynamic)"""
+        try:
+            for attempt in range(max_retries):
+                await limiter.acquire()
+                response = await client.get(url)
+                if response.status_code not in (429, 503):
+                    break
+                # Server asked us to slow down - pause every worker, not just this one
+                retry_after = response.headers.get('Retry-After', '')
+                limiter.pause(int(retry_after) if retry_after.isdigit() else 2 ** (attempt + 1))
+            response.raise_for_status()
+            
+            # Parse on another core while this worker's event loop keeps other requests moving
+            links = await asyncio.get_running_loop().run_in_executor(parse_pool, extract_links, response.content)
+        except Exception as e:
+            return url, [], str(e), False
+        
+        if links is None:
+            return url, [], None, True
+        return url, self.build_documents(links), None, False
+    
+    async def _crawl_all(self, urls):
+        """Crawl static listing pages over one pooled async client; returns URLs that need Selenium"""
+        limits = httpx.Limits(max_connections=self.max_workers, max_keepalive_connections=self.max_workers)
+        limiter = TokenBucket(self.requests_per_second)
+        urls = iter(urls)
+        dynamic_urls = []
+        
+        async def worker(client):
+            # Workers pull from one shared iterator, so a slow page never holds up the others
+            for url in urls:
+                url, page_docs, error, is_dynamic = await self.fetch(client, limiter, parse_pool, url)
+                if is_dynamic:
+                    dynamic_urls.append(url)
+                else:
+                    self.record_page(url, page_docs, error)
+        
+        # HTTP/2 multiplexes the workers' requests over a few TLS connections
+        with ProcessPoolExecutor() as parse_pool:
+            async with httpx.AsyncClient(http2=True, headers=self.session.headers, limits=limits,
+                                         timeout=15, follow_redirects=True) as client:
+                await asyncio.gather(*(worker(client) for _ in range(self.max_workers)))
+        
+        return dynamic_urls
+    
     def extract_documents_from_page(self, driver, url):
         """Extract document information from a page using Selenium"""
         try:
             driver.get(url)
             
             # Wait for content to load
-            WebDriverWait(driver, 10).wait(
+            WebDriverWait(driver, 10).until(
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
             )
             
-            # Get page source and parse with BeautifulSoup for easier handling
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            page_docs = []
-            
-            # Look for document links in various formats
-            selectors = [
-                'a[href*="/van-ban/"]',
-                'a[href*="/chi-thi/"]', 
-                'a[href*="/thong-tu/"]',
-                'a[href*="/nghi-dinh/"]',
-                'a[href*="/quyet-dinh/"]',
-                'a[href*="/luat/"]',
-                'a[href*="/cong-van/"]',
-                'a[href*="/thong-bao/"]',
-                '.doc-title a',
-                '.document-item a',
-                '.search-result a',
-                'h3 a',
-                'h4 a'
-            ]
-            
-            found_links = set()
-            for selector in selectors:
-                links = soup.select(selector)
-                for link in links:
-                    href = link.get('href')
-                    if href:
-                        full_url = urljoin(self.base_url, href)
-                        found_links.add(full_url)
-            
-            # Process each document link
-            for doc_url in found_links:
-                if doc_url in self.processed_urls:
-                    continue
-                    
-                try:
-                    # Extract basic info from the current page
-                    link_element = soup.find('a', href=lambda x: x and doc_url.split('/')[-1] in x)
-                    if link_element:
-                        title = link_element.get_text(strip=True)
-                        if title and len(title) > 10:  # Filter out very short titles
-                            doc_info = {
-                                'title': title,
-                                'url': doc_url,
-                                'summary': '',
-                                'category': 'Giao thông',
-                                'date': '',
-                                'file_type': '',
-                                'file_url': '',
-                                'md5_hash': self.calculate_md5(doc_url)
-                            }
-                            page_docs.append(doc_info)
-                            
-                except Exception as e:
-                    logging.debug(f"Error processing link {doc_url}: {e}")
-                    continue
-            
-            return page_docs
+            # Match links in the browser instead of transferring and re-parsing page_source
+            return self.build_documents(driver.execute_script(DOCUMENT_LINKS_JS, _DOCUMENT_LINK_XPATH))
             
         except TimeoutException:
             logging.warning(f"⏰ Timeout loading {url}")
@@ -242,15 +351,14 @@ class FastSeleniumCrawler:
     def worker_crawl_pages(self, url_queue, results_queue):
         """Worker function to crawl pages using Selenium"""
         driver = self.create_driver()
-        if not driver:
-            logging.error("Failed to create driver for worker")
-            return
-            
         try:
+            if not driver:
+                logging.error("Failed to create driver for worker")
+                return
+            
             while True:
-                try:
-                    url = url_queue.get(timeout=1)
-                except queue.Empty:
+                url = url_queue.get()
+                if url is None:  # The producer has no more URLs
                     break
                     
                 try:
@@ -259,112 +367,159 @@ class FastSeleniumCrawler:
                     
                 except Exception as e:
                     results_queue.put((url, [], str(e)))
-                finally:
-                    url_queue.task_done()
                     
         finally:
-            driver.quit()
+            if driver:
+                driver.quit()
+            results_queue.put(None)  # Tell the consumer this worker is done
     
-    def calculate_md5(self, text):
-        """Calculate MD5 hash for deduplication"""
-        return hashlib.md5(text.encode('utf-8')).hexdigest()
+    def load_checkpoint(self):
+        """Replay documents found by earlier runs from the append-only checkpoint"""
+        if not os.path.exists(self.checkpoint_file):
+            return
+        
+        recovered = 0
+        with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    doc = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn last line from an interrupted write
+                if doc['url'] not in self.processed_urls:
+                    self.documents.append(doc)
+                    self.processed_urls.add(doc['url'])
+                    recovered += 1
+        
+        logging.info(f"♻️ Recovered {recovered} documents from {self.checkpoint_file}")
     
     def save_progress(self):
-        """Save current progress to Excel file"""
+        """Save the final results to Excel file"""
         if not self.documents:
             return
             
-        df = pd.DataFrame(self.documents)
+        df = pd.DataFrame(self.documents, columns=DOCUMENT_COLUMNS)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"luatvietnam_selenium_backup_{timestamp}.xlsx"
         
         try:
-            df.to_excel(filename, index=False)
+            write_workbook(df, filename)
             logging.info(f"💾 Saved {len(self.documents)} documents to {filename}")
             return filename
         except Exception as e:
             logging.error(f"❌ Error saving progress: {e}")
             return None
     
-    def run_fast_crawl(self):
-        """Run the fast Selenium-based crawl"""
-        logging.info("🚀 Starting Fast Selenium Crawler")
-        logging.info(f"⚙️ Configuration: {self.max_workers} workers, headless={self.headless}")
+    def record_page(self, url, page_docs, error):
+        """Merge one crawled page's results and report progress"""
+        self.processed_count += 1
         
-        # Load existing data
-        self.load_existing_data()
-        start_count = len(self.documents)
-        
-        # Generate URLs to crawl
-        all_urls = self.generate_all_urls()
-        
-        # Filter out already processed URLs  
-        remaining_urls = [url for url in all_urls if not any(processed in url for processed in self.processed_urls)]
-        logging.info(f"📊 URLs to process: {len(remaining_urls)}")
+        if error:
+            self.failed_urls.append(url)
+            logging.warning(f"❌ Failed {url}: {error}")
+        else:
+            # Add new documents; only the result loop writes here, so no lock is needed.
+            # add() and a size check probe the set once per URL instead of twice
+            for doc in page_docs:
+                seen_before = len(self.processed_urls)
+                self.processed_urls.add(doc['url'])
+                if len(self.processed_urls) > seen_before:
+                    self.documents.append(doc)
+                    self._checkpoint.write(json.dumps(doc, ensure_ascii=False) + '\n')
+            
+            if page_docs:
+                logging.info(f"📄 Found {len(page_docs)} new docs on {url}")
         
-        # Setup queues for parallel processing
-        url_queue = queue.Queue()
+        # Progress update every 50 URLs
+        if self.processed_count % 50 == 0:
+            current_total = len(self.documents)
+            progress = current_total / 16463 * 100
+            logging.info(f"📊 Progress: {self.processed_count} URLs | {current_total} docs ({progress:.1f}%)")
+    
+    def crawl_dynamic_pages(self, urls):
+        """Crawl JS-rendered pages with a pool of Selenium workers"""
+        # Bounded queue: the producer waits while the workers catch up
+        url_queue = queue.Queue(maxsize=1024)
         results_queue = queue.Queue()
+        worker_count = min(self.max_workers, len(urls))
         
-        # Add URLs to queue
-        for url in remaining_urls:
-            url_queue.put(url)
+        # Resolve and launch chromedriver once; each worker opens its own session on it
+        self.driver_service = Service(ChromeDriverManager().install())
+        try:
+            self.driver_service.start()
+        except WebDriverException:
+            self.driver_service.stop()  # Don't leave a half-started chromedriver behind
+            raise
         
-        # Start worker threads
+        # Start worker threads first so Chrome boots while URLs are being queued
         workers = []
-        for i in range(self.max_workers):
+        for i in range(worker_count):
             worker = threading.Thread(target=self.worker_crawl_pages, args=(url_queue, results_queue))
             worker.daemon = True
             worker.start()
             workers.append(worker)
-            
-        logging.info(f"👥 Started {len(workers)} worker threads")
         
-        # Process results
-        processed_count = 0
-        new_docs = 0
+        def produce():
+            for url in urls:
+                url_queue.put(url)
+            for _ in range(worker_count):
+                url_queue.put(None)
         
+        threading.Thread(target=produce, daemon=True).start()
+        logging.info(f"👥 Started {len(workers)} Selenium worker threads for {len(urls)} dynamic pages")
+        
+        # Process results until every worker has signed off
+        finished = 0
         try:
-            while processed_count < len(remaining_urls):
+            while finished < worker_count:
                 try:
-                    url, page_docs, error = results_queue.get(timeout=60)
-                    processed_count += 1
-                    
-                    if error:
-                        self.failed_urls.append(url)
-                        logging.warning(f"❌ Failed {url}: {error}")
-                    else:
-                        # Add new documents
-                        for doc in page_docs:
-                            if doc['url'] not in self.processed_urls:
-                                with self.lock:
-                                    self.documents.append(doc)
-                                    self.processed_urls.add(doc['url'])
-                                    new_docs += 1
-                        
-                        if page_docs:
-                            logging.info(f"📄 Found {len(page_docs)} new docs on {url}")
-                    
-                    # Progress update every 50 URLs
-                    if processed_count % 50 == 0:
-                        current_total = len(self.documents)
-                        progress = current_total / 16463 * 100
-                        logging.info(f"📊 Progress: {processed_count}/{len(remaining_urls)} URLs | {current_total} docs ({progress:.1f}%)")
-                        
-                        # Save progress periodically
-                        if processed_count % 200 == 0:
-                            self.save_progress()
-                            
+                    result = results_queue.get(timeout=60)
                 except queue.Empty:
                     logging.warning("⏰ Timeout waiting for results")
                     break
+                
+                if result is None:
+                    finished += 1
+                else:
+                    self.record_page(*result)
+        finally:
+            # Wait for all workers to finish
+            for worker in workers:
+                worker.join(timeout=30)
+            self.driver_service.stop()
+    
+    def run_fast_crawl(self):
+        """Run the fast crawl: async HTTP for static pages, Selenium only for JS-rendered ones"""
+        logging.info("🚀 Starting Fast Selenium Crawler")
+        logging.info(f"⚙️ Configuration: {self.max_workers} workers, {self.requests_per_second} req/s, headless={self.headless}")
+        
+        # Load existing data, then documents checkpointed by earlier runs
+        self.load_existing_data()
+        self.load_checkpoint()
+        start_count = len(self.documents)
+        
+        # Discover the last pages up front: the blocking probes must not run inside the event loop
+        remaining_urls = [url for url in self.generate_all_urls() if url not in self.processed_urls]
+        logging.info(f"📋 {len(remaining_urls)} listing pages to crawl")
+        
+        self.processed_count = 0
+        
+        # New documents are appended as they are found; block buffering keeps writes cheap
+        self._checkpoint = open(self.checkpoint_file, 'a', encoding='utf-8', buffering=1 << 20)
+        try:
+            # Listing pages are server-rendered, so plain HTTP handles almost all of them
+            dynamic_urls = asyncio.run(self._crawl_all(remaining_urls))
+            if dynamic_urls:
+                try:
+                    self.crawl_dynamic_pages(dynamic_urls)
+                except Exception as e:
+                    # No usable Chrome/chromedriver: keep what the HTTP pass found and save it below
+                    logging.error(f"❌ Selenium phase failed, {len(dynamic_urls)} dynamic pages skipped: {e}")
+                    self.failed_urls.extend(dynamic_urls)
                     
         except KeyboardInterrupt:
             logging.info("⚠️ Crawling interrupted by user")
-        
-        # Wait for all workers to finish
-        for worker in workers:
-            worker.join(timeout=30)
+        finally:
+            self._checkpoint.close()
         
         # Final results
         final_count = len(self.documents)
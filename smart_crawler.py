@@ -5,18 +5,20 @@ Focuses on finding actual working URLs first, then crawling efficiently
 """
 
 import time
+import math
 import logging
 import pandas as pd
 from datetime import datetime
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-import hashlib
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import httpx
+import asyncio
+from selectolax.parser import HTMLParser
 import os
 import json
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
+from crawl_common import write_workbook, TokenBucket
 
 # Configure logging
 logging.basicConfig(
@@ -28,15 +30,93 @@ logging.basicConfig(
     ]
 )
 
+BASE_URL = "https://luatvietnam.vn"
+
+def absolute_url(href):
+    """Resolve a site-relative link without going through urljoin"""
+    if href.startswith('http'):
+        return href
+    if href.startswith('//'):
+        return 'https:' + href
+    return BASE_URL + (href if href.startswith('/') else '/' + href)
+
+# Columns of a crawled document, in spreadsheet order
+DOCUMENT_COLUMNS = ['title', 'url', 'summary', 'category', 'date', 'file_type', 'file_url']
+
+# Document link patterns, combined so each page is walked once
+DOCUMENT_LINK_SELECTOR = ', '.join([
+    'a[href*="/van-ban/"]',
+    'a[href*="/chi-thi/"]',
+    'a[href*="/thong-tu/"]',
+    'a[href*="/nghi-dinh/"]',
+    'a[href*="/quyet-dinh/"]',
+    'a[href*="/luat/"]',
+    'a[href*="/cong-van/"]',
+    'a[href*="/thong-bao/"]',
+    '.doc-title a',
+    '.document-item a',
+    '.search-result a',
+    'h3 a',
+    'h4 a'
+])
+
+# Document path prefixes that mark a listing page as having real content
+CONTENT_PATH_PREFIXES = ['/van-ban/', '/chi-thi/', '/thong-tu/', '/nghi-dinh/', '/quyet-dinh/']
+
+# All prefixes in one alternation, so the raw HTML is scanned once for any of them
+CONTENT_HREF_RE = re.compile(
+    r'href=["\'][^"\']*(?:' + '|'.join(re.escape(p) for p in CONTENT_PATH_PREFIXES) + ')'
+)
+CONTENT_HREF_BYTES_RE = re.compile(CONTENT_HREF_RE.pattern.encode())
+
+# Subset that marks a listing page as having real content
+CONTENT_LINK_SELECTOR = ', '.join([
+    'a[href*="/van-ban/"]',
+    'a[href*="/chi-thi/"]',
+    'a[href*="/thong-tu/"]',
+    'a[href*="/nghi-dinh/"]',
+    'a[href*="/quyet-dinh/"]',
+    '.doc-title a',
+    '.document-item a',
+    '.search-result a'
+])
+
+# Traffic-related keywords
+TRAFFIC_KEYWORDS = [
+    'giao thông', 'giao thong', 'xe cộ', 'ô tô', 'xe máy',
+    'đường bộ', 'duong bo', 'vận tải', 'van tai',
+    'lái xe', 'lai xe', 'bằng lái', 'bang lai',
+    'vi phạm', 'vi pham', 'phạt nguội', 'phat nguoi',
+    'tốc độ', 'toc do', 'an toàn', 'an toan',
+    'đường sắt', 'duong sat', 'tàu hỏa', 'tau hoa',
+    'hàng không', 'hang khong', 'máy bay', 'may bay',
+    'cảng', 'port', 'bến xe', 'ben xe',
+    'biển số', 'bien so', 'đăng ký', 'dang ky',
+    'kiểm định', 'kiem dinh', 'bảo hiểm', 'bao hiem'
+]
+
+# Matched against the lowercased title in a single search
+_TRAFFIC_RE = re.compile('|'.join(map(re.escape, TRAFFIC_KEYWORDS)))
+
+# Listing requests per second to aim for, and never exceed; concurrency = rate x measured latency (Little's law)
+TARGET_REQUESTS_PER_SECOND = 20
+MIN_CONCURRENCY, MAX_CONCURRENCY = 4, 64
+
 class SmartCrawler:
     def __init__(self, max_workers=6):
-        self.base_url = "https://luatvietnam.vn"
+        self.base_url = BASE_URL
         self.documents = []
         self.processed_urls = set()
         self.failed_urls = []
         self.working_urls = set()
+        self.max_pages_cache = {}  # base URL -> last page with content
+        self.checkpoint_file = "smart_checkpoint.jsonl"
+        self.http_cache_file = "smart_http_cache.json"
+        self.http_cache = {}  # page URL -> ETag, Last-Modified and linked document URLs from the last full fetch
         self.max_workers = max_workers
-        self.lock = threading.Lock()
+        self.concurrency = max_workers  # Listing fetches in flight; ramps up to target_concurrency
+        self.target_concurrency = max_workers  # Tuned from the latency measured during discovery
+        self.probe_latencies = []
         
         # Setup session with better headers
         self.session = requests.Session()
@@ -44,22 +124,33 @@ class SmartCrawler:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         })
         
+        # Keep enough pooled keep-alive connections for every worker, and retry transient failures
+        adapter = HTTPAdapter(
+            pool_connections=self.max_workers * 2,
+            pool_maxsize=self.max_workers * 4,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
     def load_existing_data(self):
         """Load existing crawled data from Excel files"""
-        excel_files = [f for f in os.listdir('.') if f.startswith('luatvietnam_') and f.endswith('.xlsx')]
+        # One directory scan; DirEntry caches the stat result used to pick the newest file
+        with os.scandir('.') as entries:
+            excel_files = [(entry.stat().st_ctime, entry.name) for entry in entries
+                           if entry.name.startswith('luatvietnam_') and entry.name.endswith('.xlsx')]
         
         if not excel_files:
             logging.info("No existing backup files found. Starting fresh.")
             return
-            
-        # Sort by creation time and pick the most recent
-        excel_files.sort(key=lambda x: os.path.getctime(x), reverse=True)
-        latest_file = excel_files[0]
+        
+        # Pick the most recently created file
+        latest_file = max(excel_files)[1]
         
         try:
             df = pd.read_excel(latest_file)
@@ -68,20 +159,10 @@ class SmartCrawler:
             logging.info(f"Loading existing data from {latest_file}")
             logging.info(f"Found {existing_docs} existing documents")
             
-            # Convert to our format and track processed URLs
-            for _, row in df.iterrows():
-                doc = {
-                    'title': row['title'],
-                    'url': row['url'],
-                    'summary': row.get('summary', ''),
-                    'category': row.get('category', ''),
-                    'date': row.get('date', ''),
-                    'file_type': row.get('file_type', ''),
-                    'file_url': row.get('file_url', ''),
-                    'md5_hash': row.get('md5_hash', '')
-                }
-                self.documents.append(doc)
-                self.processed_urls.add(row['url'])
+            # Convert to our format and track processed URLs, column-wise
+            df = df.reindex(columns=DOCUMENT_COLUMNS, fill_value='')
+            self.documents.extend(df.to_dict('records'))
+            self.processed_urls.update(df['url'].tolist())
             
             logging.info(f"Loaded {len(self.documents)} documents from backup")
             logging.info(f"Progress: {len(self.documents)/16463*100:.1f}%")
@@ -90,7 +171,7 @@ class SmartCrawler:
             logging.error(f"Error loading existing data: {e}")
     
     def discover_working_urls(self):
-        """Discover which base URLs actually work before full crawling"""
+        """Discover which base URLs actually work before full crawling; returns (base_url, max_page) pairs"""
         logging.info("Phase 1: Discovering working URLs...")
         
         # Test main base URLs first
@@ -107,13 +188,18 @@ class SmartCrawler:
         
         for base in base_patterns:
             try:
-                response = self.session.get(base, timeout=10)
-                if response.status_code == 200:
-                    working_patterns.append(base)
+                # A HEAD is enough to tell whether the listing exists
+                with self.session.head(base, timeout=10, allow_redirects=True) as response:
+                    status = response.status_code
+                if status == 405:  # HEAD not allowed; fall back to a GET without reading the body
+                    with self.session.get(base, timeout=10, stream=True) as response:
+                        status = response.status_code
+                if status == 200:
                     logging.info(f"Working base URL: {base}")
                     
                     # Test pagination for this pattern
                     max_page = self.find_max_pages(base)
+                    working_patterns.append((base, max_page))
                     logging.info(f"Max pages for {base}: {max_page}")
                     
             except Exception as e:
@@ -123,27 +209,78 @@ class SmartCrawler:
     
     def find_max_pages(self, base_url):
         """Find the maximum page number for a given base URL"""
+        if base_url in self.max_pages_cache:
+            return self.max_pages_cache[base_url]
+        
+        # Double the page number until a page comes back empty
         max_page = 1
+        probe = 1
+        while probe <= 200 and self.page_has_content(self.build_page_url(base_url, probe)):
+            max_page = probe
+            probe *= 2
         
-        # Binary search to find max page efficiently
-        left, right = 1, 200
+        # Then binary search between the last full page and the first empty one
+        left, right = max_page + 1, min(probe - 1, 200)
         
         while left <= right:
             mid = (left + right) // 2
-            test_url = self.build_page_url(base_url, mid)
-            
-            try:
-                response = self.session.get(test_url, timeout=10)
-                if response.status_code == 200 and self.has_content(response.text):
-                    max_page = mid
-                    left = mid + 1
-                else:
-                    right = mid - 1
-            except:
+            if self.page_has_content(self.build_page_url(base_url, mid)):
+                max_page = mid
+                left = mid + 1
+            else:
                 right = mid - 1
         
+        self.max_pages_cache[base_url] = max_page
         return max_page
     
+    def page_has_content(self, url):
+        """Fetch a listing page and report whether it has any documents"""
+        try:
+            started = time.perf_counter()
+            with self.session.get(url, timeout=10, stream=True) as response:
+                self.probe_latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    return False
+                
+                # Stop downloading as soon as a document link shows up
+                body = bytearray()
+                for chunk in response.iter_content(32768):
+                    body += chunk
+                    if CONTENT_HREF_BYTES_RE.search(body):
+                        return True
+                html = body.decode(response.encoding or 'utf-8', errors='replace')
+        except Exception:
+            return False
+        
+        return self.has_content(html)
+    
+    def page_links(self, url):
+        """Fetch a listing page and return the document URLs it links to"""
+        try:
+            with self.session.get(url, timeout=10) as response:
+                if response.status_code != 200:
+                    return set()
+                tree = HTMLParser(response.text)
+        except Exception:
+            return set()
+        
+        return {absolute_url(link.attributes['href']) for link in tree.css(DOCUMENT_LINK_SELECTOR)
+                if link.attributes.get('href')}
+    
+    def distinct_variants(self, base_url):
+        """Return the ShowSapo suffixes whose first page links documents the plain listing doesn't"""
+        seen = self.page_links(self.build_page_url(base_url, 1))
+        variants = []
+        
+        for suffix in ('&ShowSapo=0', '&ShowSapo=1'):
+            links = self.page_links(f"{base_url}?page=1{suffix}")
+            if links - seen:
+                variants.append(suffix)
+                seen |= links
+        
+        logging.info(f"ShowSapo variants kept for {base_url}: {variants or 'none'}")
+        return variants
+    
     def build_page_url(self, base_url, page_num):
         """Build a page URL with proper parameters"""
         if "search?" in base_url:
@@ -157,165 +294,233 @@ class SmartCrawler:
         """Check if the page has actual content (not just empty pagination)"""
         if not html:
             return False
-            
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Look for document links
-        selectors = [
-            'a[href*="/van-ban/"]',
-            'a[href*="/chi-thi/"]', 
-            'a[href*="/thong-tu/"]',
-            'a[href*="/nghi-dinh/"]',
-            'a[href*="/quyet-dinh/"]',
-            '.doc-title a',
-            '.document-item a',
-            '.search-result a'
-        ]
         
-        for selector in selectors:
-            if soup.select(selector):
-                return True
+        # Most content pages carry a document href; find it without building a tree
+        if CONTENT_HREF_RE.search(html):
+            return True
+        
+        tree = HTMLParser(html)
         
-        return False
+        # Otherwise fall back to the class-based document containers
+        return tree.css_first(CONTENT_LINK_SELECTOR) is not None
     
-    def extract_documents_from_page(self, url):
+    async def extract_documents_from_page(self, client, limiter, url):
         """Extract document information from a single page"""
         try:
-            response = self.session.get(url, timeout=15)
-            if response.status_code != 200:
-                return []
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            page_docs = []
+            # Revalidate pages seen on earlier runs; load_http_cache only kept pages whose documents are loaded
+            headers = {}
+            cached = self.http_cache.get(url, {})
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
             
-            # Look for document links in various formats
-            selectors = [
-                'a[href*="/van-ban/"]',
-                'a[href*="/chi-thi/"]', 
-                'a[href*="/thong-tu/"]',
-                'a[href*="/nghi-dinh/"]',
-                'a[href*="/quyet-dinh/"]',
-                'a[href*="/luat/"]',
-                'a[href*="/cong-van/"]',
-                'a[href*="/thong-bao/"]',
-                '.doc-title a',
-                '.document-item a',
-                '.search-result a',
-                'h3 a',
-                'h4 a'
-            ]
+            await limiter.acquire()
+            response = await client.get(url, headers=headers)
+            if response.status_code == 429:
+                # Rate limited: retire half the workers for good and hold every request back before one retry
+                self.concurrency = self.target_concurrency = max(1, self.concurrency // 2)
+                retry_after = response.headers.get('Retry-After', '')
+                logging.warning(f"Rate limited on {url}; dropping to {self.concurrency} workers")
+                limiter.pause(int(retry_after) if retry_after.isdigit() else 5)
+                await limiter.acquire()
+                response = await client.get(url, headers=headers)
             
-            found_links = set()
-            for selector in selectors:
-                links = soup.select(selector)
-                for link in links:
-                    href = link.get('href')
-                    if href:
-                        full_url = urljoin(self.base_url, href)
-                        if self.is_traffic_document(link.get_text(strip=True)):
-                            found_links.add((full_url, link.get_text(strip=True)))
+            if response.status_code != 200:  # Includes 304 Not Modified
+                return []
             
-            # Process each document link
-            for doc_url, title in found_links:
-                if doc_url in self.processed_urls:
-                    continue
-                    
-                if title and len(title) > 10:  # Filter out very short titles
-                    doc_info = {
-                        'title': title,
-                        'url': doc_url,
-                        'summary': '',
-                        'category': 'Giao thông',
-                        'date': '',
-                        'file_type': '',
-                        'file_url': '',
-                        'md5_hash': self.calculate_md5(doc_url)
-                    }
-                    page_docs.append(doc_info)
+            # Parse off the event loop so the other requests keep moving
+            page_docs, linked_urls = await asyncio.get_running_loop().run_in_executor(
+                None, self.parse_documents, response.text)
             
+            if 'ETag' in response.headers or 'Last-Modified' in response.headers:
+                self.http_cache[url] = {'etag': response.headers.get('ETag'),
+                                        'last_modified': response.headers.get('Last-Modified'),
+                                        'docs': linked_urls}
             return page_docs
             
         except Exception as e:
             logging.warning(f"Error extracting from {url}: {e}")
+            self.failed_urls.append(url)
             return []
     
+    def parse_documents(self, html):
+        """Extract the new traffic documents linked from a listing page's HTML; also returns every kept document URL"""
+        tree = HTMLParser(html)
+        page_docs = []
+        known_urls = []
+        
+        # Look for document links in various formats, in one tree walk;
+        # keep the first traffic-related title for each new document URL.
+        # The set lookups come first so known URLs never reach the keyword scan.
+        # Only the event loop adds to processed_urls (in record_page); a stale read just defers a duplicate to the merge
+        found_links = {}
+        for link in tree.css(DOCUMENT_LINK_SELECTOR):
+            href = link.attributes.get('href')
+            if href:
+                full_url = absolute_url(href)
+                if full_url in found_links:
+                    continue
+                if full_url in self.processed_urls:
+                    known_urls.append(full_url)
+                    continue
+                title = link.text(strip=True)
+                if self.is_traffic_document(title):
+                    found_links[full_url] = title
+        
+        # Process each document link
+        for doc_url, title in found_links.items():
+            if title and len(title) > 10:  # Filter out very short titles
+                doc_info = {
+                    'title': title,
+                    'url': doc_url,
+                    'summary': '',
+                    'category': 'Giao thông',
+                    'date': '',
+                    'file_type': '',
+                    'file_url': ''
+                }
+                page_docs.append(doc_info)
+        
+        return page_docs, list(dict.fromkeys(known_urls)) + [doc['url'] for doc in page_docs]
+    
     def is_traffic_document(self, title):
         """Check if a document title is related to traffic"""
         if not title:
             return False
         
-        title_lower = title.lower()
-        
-        # Traffic-related keywords
-        traffic_keywords = [
-            'giao thông', 'giao thong', 'xe cộ', 'ô tô', 'xe máy', 
-            'đường bộ', 'duong bo', 'vận tải', 'van tai',
-            'lái xe', 'lai xe', 'bằng lái', 'bang lai',
-            'vi phạm', 'vi pham', 'phạt nguội', 'phat nguoi',
-            'tốc độ', 'toc do', 'an toàn', 'an toan',
-            'đường sắt', 'duong sat', 'tàu hỏa', 'tau hoa',
-            'hàng không', 'hang khong', 'máy bay', 'may bay',
-            'cảng', 'port', 'bến xe', 'ben xe',
-            'biển số', 'bien so', 'đăng ký', 'dang ky',
-            'kiểm định', 'kiem dinh', 'bảo hiểm', 'bao hiem'
-        ]
+        return _TRAFFIC_RE.search(title.lower()) is not None
+    
+    def load_checkpoint(self):
+        """Replay documents found by earlier runs from the append-only checkpoint"""
+        if not os.path.exists(self.checkpoint_file):
+            return
         
-        return any(keyword in title_lower for keyword in traffic_keywords)
+        recovered = 0
+        with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    doc = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn last line from an interrupted write
+                if doc['url'] not in self.processed_urls:
+                    self.documents.append(doc)
+                    self.processed_urls.add(doc['url'])
+                    recovered += 1
+        
+        logging.info(f"Recovered {recovered} documents from {self.checkpoint_file}")
+    
+    def load_http_cache(self):
+        """Load validators saved by the previous run for conditional page requests"""
+        if not os.path.exists(self.http_cache_file):
+            return
+        
+        try:
+            with open(self.http_cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Ignoring unreadable {self.http_cache_file}: {e}")
+            return
+        
+        # A 304 yields no documents, so only trust validators whose page documents are all loaded
+        self.http_cache = {url: entry for url, entry in cache.items()
+                           if isinstance(entry, dict) and self.processed_urls.issuperset(entry.get('docs', ()))}
+        logging.info(f"Loaded HTTP validators for {len(self.http_cache)} of {len(cache)} pages")
     
-    def calculate_md5(self, text):
-        """Calculate MD5 hash for deduplication"""
-        return hashlib.md5(text.encode('utf-8')).hexdigest()
+    def save_http_cache(self):
+        """Persist page validators once this run's documents are safely checkpointed"""
+        tmp_file = self.http_cache_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.http_cache, f)
+        os.replace(tmp_file, self.http_cache_file)
     
     def save_progress(self):
-        """Save current progress to Excel file"""
+        """Save the final results to Excel file"""
         if not self.documents:
             return
             
-        df = pd.DataFrame(self.documents)
+        df = pd.DataFrame(self.documents, columns=DOCUMENT_COLUMNS)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"luatvietnam_smart_backup_{timestamp}.xlsx"
         
         try:
-            df.to_excel(filename, index=False)
+            write_workbook(df, filename)
             logging.info(f"Saved {len(self.documents)} documents to {filename}")
             return filename
         except Exception as e:
             logging.error(f"Error saving progress: {e}")
             return None
     
-    def crawl_urls_parallel(self, urls):
-        """Crawl multiple URLs in parallel"""
-        new_documents = []
-        
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all URLs for processing
-            future_to_url = {executor.submit(self.extract_documents_from_page, url): url for url in urls}
-            
-            for future in as_completed(future_to_url):
-                url = future_to_url[future]
-                try:
-                    page_docs = future.result()
-                    if page_docs:
-                        with self.lock:
-                            for doc in page_docs:
-                                if doc['url'] not in self.processed_urls:
-                                    new_documents.append(doc)
-                                    self.processed_urls.add(doc['url'])
-                        
-                        logging.info(f"Found {len(page_docs)} new docs on {url}")
-                    
-                except Exception as e:
-                    logging.warning(f"Failed to process {url}: {e}")
-                    self.failed_urls.append(url)
+    async def _crawl_all(self, urls, checkpoint):
+        """Fetch and parse every listing page on one event loop, merging results as pages finish"""
+        urls = iter(urls)
+        limits = httpx.Limits(max_connections=self.target_concurrency, max_keepalive_connections=32)
+        limiter = TokenBucket(TARGET_REQUESTS_PER_SECOND)
+        workers = []
+        
+        async def worker(client, worker_id):
+            # Workers pull from one shared iterator, so a slow page never holds up the others
+            for url in urls:
+                page_docs = await self.extract_documents_from_page(client, limiter, url)
+                self.record_page(url, page_docs, checkpoint)
+                
+                # Workers beyond the current limit retire after a rate-limit backoff
+                if worker_id >= self.concurrency:
+                    return
+                
+                # Ramp up one worker per finished page until the tuned target is reached
+                if self.concurrency < self.target_concurrency:
+                    self.concurrency += 1
+                    workers.append(asyncio.create_task(worker(client, self.concurrency - 1)))
+        
+        # HTTP/2 multiplexes the workers' requests over a few TLS connections; httpx falls back to HTTP/1.1 if ALPN doesn't offer h2
+        async with httpx.AsyncClient(http2=True, headers=dict(self.session.headers), limits=limits,
+                                     timeout=15, follow_redirects=True) as client:
+            workers.extend(asyncio.create_task(worker(client, i)) for i in range(self.concurrency))
+            while workers:
+                await workers.pop()
+    
+    def tune_concurrency(self):
+        """Size the crawl from the page latency measured while discovering URLs"""
+        if not self.probe_latencies:
+            return
         
-        return new_documents
+        mean_latency = sum(self.probe_latencies) / len(self.probe_latencies)
+        self.target_concurrency = max(MIN_CONCURRENCY, min(MAX_CONCURRENCY, math.ceil(TARGET_REQUESTS_PER_SECOND * mean_latency)))
+        self.concurrency = min(self.max_workers, self.target_concurrency)
+        logging.info(f"Mean page latency {mean_latency * 1000:.0f} ms -> ramping from {self.concurrency} "
+                     f"to {self.target_concurrency} concurrent fetches at up to {TARGET_REQUESTS_PER_SECOND} req/s")
+    
+    def record_page(self, url, page_docs, checkpoint):
+        """Merge one crawled page's documents and append the new ones to the checkpoint"""
+        self.processed_count += 1
+        
+        new_docs = []
+        for doc in page_docs:
+            if doc['url'] not in self.processed_urls:
+                new_docs.append(doc)
+                self.processed_urls.add(doc['url'])
+        
+        if new_docs:
+            self.documents.extend(new_docs)
+            checkpoint.writelines(json.dumps(doc, ensure_ascii=False) + '\n' for doc in new_docs)
+            logging.info(f"Found {len(new_docs)} new docs on {url}")
+        
+        # Progress update every 50 pages
+        if self.processed_count % 50 == 0:
+            checkpoint.flush()
+            current_total = len(self.documents)
+            progress = current_total / 16463 * 100
+            logging.info(f"Progress: {self.processed_count} pages | {current_total} docs ({progress:.1f}%)")
     
     def run_smart_crawl(self):
         """Run the smart crawling process"""
         logging.info("Starting Smart Crawler")
         
-        # Load existing data
+        # Load existing data, then documents checkpointed by earlier runs
         self.load_existing_data()
+        self.load_checkpoint()
+        self.load_http_cache()
         start_count = len(self.documents)
         
         # Phase 1: Discover working URLs
@@ -324,41 +529,37 @@ class SmartCrawler:
             logging.error("No working base URLs found!")
             return 0, 0
         
+        # Size the fetch pool from the latency seen while probing page counts
+        self.tune_concurrency()
+        
         # Phase 2: Generate focused URL list
         all_urls = []
-        for pattern in working_patterns:
-            max_pages = self.find_max_pages(pattern)
+        for pattern, max_pages in working_patterns:
+            # Also try ShowSapo variations for non-search URLs, but only those that list other documents
+            variants = []
+            if "search?" not in pattern and "tim-kiem" not in pattern:
+                variants = self.distinct_variants(pattern)
+            
             for page in range(1, max_pages + 1):
                 url = self.build_page_url(pattern, page)
                 all_urls.append(url)
-                
-                # Also try with ShowSapo variations for non-search URLs
-                if "search?" not in pattern and "tim-kiem" not in pattern:
-                    all_urls.append(f"{pattern}?page={page}&ShowSapo=0")
-                    all_urls.append(f"{pattern}?page={page}&ShowSapo=1")
+                for suffix in variants:
+                    all_urls.append(f"{pattern}?page={page}{suffix}")
+        
+        # Patterns can generate the same page URL; fetch each one once, in order
+        all_urls = list(dict.fromkeys(all_urls))
         
         logging.info(f"Generated {len(all_urls)} focused URLs to crawl")
         
-        # Phase 3: Parallel crawling
-        batch_size = 50
-        total_new = 0
+        # Phase 3: Parallel crawling; pages are parsed while others are still downloading
+        self.processed_count = 0
         
-        for i in range(0, len(all_urls), batch_size):
-            batch = all_urls[i:i+batch_size]
-            logging.info(f"Processing batch {i//batch_size + 1}/{(len(all_urls) + batch_size - 1)//batch_size}")
-            
-            new_docs = self.crawl_urls_parallel(batch)
-            if new_docs:
-                self.documents.extend(new_docs)
-                total_new += len(new_docs)
-                
-                current_total = len(self.documents)
-                progress = current_total / 16463 * 100
-                logging.info(f"Progress: {current_total} docs ({progress:.1f}%) - {len(new_docs)} new in this batch")
-                
-                # Save progress every few batches
-                if (i // batch_size + 1) % 5 == 0:
-                    self.save_progress()
+        # New documents are appended to the checkpoint as they are found; the workbook is written once at the end
+        with open(self.checkpoint_file, 'a', encoding='utf-8') as checkpoint:
+            asyncio.run(self._crawl_all(all_urls, checkpoint))
+        
+        # Only now are the documents behind every cached validator on disk
+        self.save_http_cache()
         
         # Final results
         final_count = len(self.documents)
@@ -7,7 +7,18 @@ This helps manage downloads in smaller batches for better control
 import pandas as pd
 import os
 import math
+import numpy as np
 from datetime import datetime
+import crawl_common
+
+# Workbooks already loaded this run, so the interactive flow reads each file once
+_loaded_frames = {}
+
+def read_excel_cached(xlsx_path):
+    """Read an Excel file once per run, through the shared Parquet shadow copy"""
+    if xlsx_path not in _loaded_frames:
+        _loaded_frames[xlsx_path] = crawl_common.read_excel_cached(xlsx_path)
+    return _loaded_frames[xlsx_path]
 
 def split_excel_file(input_file, urls_per_file=3000, output_prefix="batch", start_from_index=0):
     """
@@ -22,8 +33,9 @@ def split_excel_file(input_file, urls_per_file=3000, output_prefix="batch", star
     
     try:
         print(f"📊 Loading Excel file: {input_file}")
-        df = pd.read_excel(input_file)
-        print(f"✅ Loaded {len(df)} total documents")
+        df = read_excel_cached(input_file)
+        original_count = len(df)
+        print(f"✅ Loaded {original_count} total documents")
         
         # Apply start index filter
         if start_from_index > 0:
@@ -47,51 +59,37 @@ def split_excel_file(input_file, urls_per_file=3000, output_prefix="batch", star
             os.makedirs(output_dir)
             print(f"📁 Created directory: {output_dir}")
         
-        # Split and save files
+        # Batch metadata for every row at once; each chunk is then a plain slice
+        batch_idx = np.arange(total_urls) // urls_per_file
+        df = df.assign(
+            batch_number=batch_idx + 1,
+            batch_start_index=batch_idx * urls_per_file + start_from_index,
+            batch_end_index=np.minimum((batch_idx + 1) * urls_per_file, total_urls) + start_from_index - 1,
+            total_batches=num_files,
+            original_start_index=start_from_index
+        )
+        
+        summary_data = []
         for i in range(num_files):
             start_idx = i * urls_per_file
             end_idx = min((i + 1) * urls_per_file, total_urls)
             
-            # Extract chunk
-            chunk_df = df.iloc[start_idx:end_idx].copy()
-            
-            # Add batch information (adjusted for original index)
+            # Calculate actual indices
             actual_start_idx = start_from_index + start_idx
             actual_end_idx = start_from_index + end_idx - 1
             
-            chunk_df['batch_number'] = i + 1
-            chunk_df['batch_start_index'] = actual_start_idx
-            chunk_df['batch_end_index'] = actual_end_idx
-            chunk_df['total_batches'] = num_files
-            chunk_df['original_start_index'] = start_from_index
-            
             # Create filename with actual indices
             if start_from_index > 0:
-                filename = f"{output_prefix}_{i+1:02d}_of_{num_files:02d}_{actual_start_idx+1}_to_{actual_end_idx+1}_from_{start_from_index+1}.xlsx"
+                filename = f"{output_prefix}_{i+1:02d}_of_{num_files:02d}_{actual_start_idx+1}_to_{actual_end_idx+1}_from_{start_from_index+1}.parquet"
             else:
-                filename = f"{output_prefix}_{i+1:02d}_of_{num_files:02d}_{actual_start_idx+1}_to_{actual_end_idx+1}.xlsx"
-            
-            filepath = os.path.join(output_dir, filename)
+                filename = f"{output_prefix}_{i+1:02d}_of_{num_files:02d}_{actual_start_idx+1}_to_{actual_end_idx+1}.parquet"
             
-            # Save chunk
-            chunk_df.to_excel(filepath, index=False)
+            # Save chunk as Parquet, one row group per batch; only the summary stays a workbook
+            chunk_df = df.iloc[start_idx:end_idx]
+            chunk_df.to_parquet(os.path.join(output_dir, filename), index=False,
+                                compression='snappy', row_group_size=len(chunk_df))
             
             print(f"✅ Created: {filename} ({len(chunk_df)} URLs, original indices {actual_start_idx+1}-{actual_end_idx+1})")
-        
-        # Create summary file
-        summary_data = []
-        for i in range(num_files):
-            start_idx = i * urls_per_file
-            end_idx = min((i + 1) * urls_per_file, total_urls)
-            
-            # Calculate actual indices
-            actual_start_idx = start_from_index + start_idx
-            actual_end_idx = start_from_index + end_idx - 1
-            
-            if start_from_index > 0:
-                filename = f"{output_prefix}_{i+1:02d}_of_{num_files:02d}_{actual_start_idx+1}_to_{actual_end_idx+1}_from_{start_from_index+1}.xlsx"
-            else:
-                filename = f"{output_prefix}_{i+1:02d}_of_{num_files:02d}_{actual_start_idx+1}_to_{actual_end_idx+1}.xlsx"
             
             summary_data.append({
                 'batch_number': i + 1,
@@ -113,7 +111,7 @@ def split_excel_file(input_file, urls_per_file=3000, output_prefix="batch", star
         summary_df.to_excel(summary_file, index=False)
         
         print(f"\n📋 Summary:")
-        print(f"   Original file URLs: {len(pd.read_excel(input_file))}")
+        print(f"   Original file URLs: {original_count}")
         print(f"   Starting from index: {start_from_index + 1}")
         print(f"   URLs processed: {total_urls}")
         print(f"   Files created: {num_files}")
@@ -145,7 +143,7 @@ def main():
     for i, file in enumerate(excel_files, 1):
         if os.path.exists(file):
             try:
-                df = pd.read_excel(file)
+                df = read_excel_cached(file)
                 print(f"   {i}. {file} ({len(df)} URLs)")
             except:
                 print(f"   {i}. {file} (could not read)")
@@ -192,7 +190,7 @@ def main():
     while True:
         try:
             # Show total URLs in selected file
-            df_total = pd.read_excel(input_file)
+            df_total = read_excel_cached(input_file)
             total_urls = len(df_total)
             
             start_input = input(f"\nStart from index (0-{total_urls-1}, default 0): ").strip()